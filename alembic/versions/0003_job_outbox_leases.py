@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003_job_outbox_leases"
+down_revision = "0002_job_outbox_retries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("locked_by", sa.String(length=128), nullable=True))
+    op.add_column("jobs", sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("jobs", "locked_until")
+    op.drop_column("jobs", "locked_by")
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004_hot_path_indexes"
+down_revision = "0003_job_outbox_leases"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_jobs_pending_run_after", "jobs", ["run_after"], "status = 'pending'"),
+    ("ix_jobs_running_locked_until", "jobs", ["locked_until"], "status = 'running'"),
+    ("ix_subscriptions_user_id", "subscriptions", ["user_id"], None),
+    ("ix_subscriptions_user_active", "subscriptions", ["user_id", "plan_code", "location_code"], "status = 'active'"),
+    ("ix_tickets_user_id", "tickets", ["user_id"], None),
+    ("ix_ticket_messages_ticket_id", "ticket_messages", ["ticket_id", "id"], None),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005_reconcile_expiry_index"
+down_revision = "0004_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_subscriptions_active_expires_at",
+            "subscriptions",
+            ["expires_at", "id"],
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_subscriptions_active_expires_at",
+            table_name="subscriptions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006_remnawave_mirror"
+down_revision = "0005_reconcile_expiry_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "remnawave_users",
+        sa.Column("id", sa.String(length=64), primary_key=True),
+        sa.Column("username", sa.String(length=128), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("remote_updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    op.create_table(
+        "remnawave_servers",
+        sa.Column("id", sa.String(length=64), primary_key=True),
+        sa.Column("name", sa.String(length=128), nullable=False),
+        sa.Column("remote_updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    op.create_table(
+        "sync_state",
+        sa.Column("name", sa.String(length=32), primary_key=True),
+        sa.Column("high_water_mark", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_count", sa.Integer(), nullable=False),
+        sa.Column("last_run_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_state")
+    op.drop_table("remnawave_servers")
+    op.drop_table("remnawave_users")
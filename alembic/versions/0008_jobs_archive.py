@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0008_jobs_archive"
+down_revision = "0007_broadcasts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs_archive",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_type", sa.String(length=64), nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("idempotency_key", sa.String(length=128), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.String(length=2000), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", "updated_at"),
+        postgresql_partition_by="RANGE (updated_at)",
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_jobs_finished_updated_at",
+            "jobs",
+            ["updated_at"],
+            postgresql_where=sa.text("status IN ('done', 'failed')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_jobs_finished_updated_at", table_name="jobs", postgresql_concurrently=True, if_exists=True)
+    op.drop_table("jobs_archive")
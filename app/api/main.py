@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import hashlib
+import hmac
 import json
 import logging
-from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.common.config import settings
 from app.common.logging import setup_logging
+from app.common.metrics import JOBS_DEPTH
+from app.common.redis import get_redis
+from app.common.secret_files import cached_secret
 from app.db.models import JobOutbox
-from app.db.repos.jobs import enqueue_job_safe
+from app.db.repos.jobs import count_active_jobs, enqueue_jobs_bulk
 from app.db.session import SessionLocal
+from app.integrations.remnawave.client import close_http_client
 from app.integrations.remnawave.endpoint_map import build_endpoint_map, validate_endpoints
 
 
@@ -26,16 +32,31 @@ async def startup() -> None:
     logger.info("remnawave_endpoint_check", extra={"extra": {"mode": settings.remnawave_api_mode}})
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await close_http_client()
+
+
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics() -> Response:
+    async with SessionLocal() as session:
+        depth = await count_active_jobs(session)
+    JOBS_DEPTH.clear()
+    for status, job_type, count in depth:
+        JOBS_DEPTH.labels(status=status, job_type=job_type).set(count)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.post(settings.remnawave_webhook_path)
 async def remnawave_webhook(request: Request, x_signature: str | None = Header(default=None)) -> dict:
     if not settings.remnawave_webhook_enabled:
         raise HTTPException(status_code=404, detail="disabled")
-    secret = settings.read_secret(settings.remnawave_webhook_secret_file)
+    secret = cached_secret(settings.remnawave_webhook_secret_file)
     if x_signature != secret:
         raise HTTPException(status_code=403, detail="forbidden")
     payload = await request.json()
@@ -60,6 +81,30 @@ async def remnawave_webhook(request: Request, x_signature: str | None = Header(d
             status="pending",
             idempotency_key=idem,
         )
-        await enqueue_job_safe(session, job)
-    logger.info("remnawave_webhook_enqueued", extra={"extra": {"job_type": job_type, "id": idem}})
+        report = await enqueue_jobs_bulk(session, [job])
+        await session.commit()
+    logger.info(
+        "remnawave_webhook_enqueued",
+        extra={"extra": {"job_type": job_type, "id": idem, "duplicate": bool(report.duplicates)}},
+    )
+    return {"status": "accepted"}
+
+
+@app.post(settings.bot_webhook_path)
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: str | None = Header(default=None),
+) -> dict:
+    if settings.bot_mode != "webhook":
+        raise HTTPException(status_code=404, detail="disabled")
+    secret = cached_secret(settings.bot_webhook_secret_file)
+    if not x_telegram_bot_api_secret_token or not hmac.compare_digest(x_telegram_bot_api_secret_token, secret):
+        raise HTTPException(status_code=403, detail="forbidden")
+    redis = get_redis()
+    backlog = await redis.xlen(settings.bot_update_stream)
+    if backlog >= settings.bot_update_stream_max_backlog:
+        logger.warning("telegram_webhook_backlog_full", extra={"extra": {"backlog": backlog}})
+        raise HTTPException(status_code=503, detail="busy")
+    body = await request.body()
+    await redis.xadd(settings.bot_update_stream, {"update": body.decode("utf-8")})
     return {"status": "accepted"}
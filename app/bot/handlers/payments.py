@@ -8,8 +8,7 @@ from aiogram.types import Message, PreCheckoutQuery
 from app.bot.ui.keyboards import back_home_keyboard
 from app.bot.ui.render import ensure_root
 from app.bot.ui.texts import PAYMENT_SUCCESS_TEXT
-from app.db.models import JobOutbox
-from app.db.repos.jobs import enqueue_job_safe
+from app.common.tracing import span
 from app.db.repos.payments import get_intent_by_id
 from app.db.session import SessionLocal
 from app.payments.providers.stars import StarsProvider
@@ -32,6 +31,7 @@ async def pre_checkout_handler(query: PreCheckoutQuery, bot: Bot) -> None:
             return
         service = PaymentService(StarsProvider())
         await service.mark_invoiced(session, intent)
+        await session.commit()
     await query.answer(ok=True)
 
 
@@ -44,29 +44,19 @@ async def successful_payment_handler(message: Message, bot: Bot) -> None:
         intent_id = uuid.UUID(payment_data.invoice_payload)
     except ValueError:
         return
-    async with SessionLocal() as session:
-        intent = await get_intent_by_id(session, intent_id)
-        if not intent:
-            return
-        service = PaymentService(StarsProvider())
-        payment = await service.handle_successful_payment(
-            session,
-            intent,
-            provider_payment_id=payment_data.telegram_payment_charge_id,
-            raw=payment_data.model_dump(),
-        )
-        period_days = intent.period_days + int(intent.meta.get("free_days", 0))
-        job = JobOutbox(
-            job_type="provision_subscription",
-            payload={
-                "user_id": intent.user_id,
-                "plan_code": intent.plan_code,
-                "location_code": intent.location_code,
-                "period_days": period_days,
-                "payment_id": str(payment.id),
-            },
-            status="pending",
-            idempotency_key=f"payment:{payment.id}",
-        )
-        await enqueue_job_safe(session, job)
+    with span("payment.successful", intent_id=str(intent_id)):
+        async with SessionLocal() as session:
+            intent = await get_intent_by_id(session, intent_id)
+            if not intent:
+                return
+            service = PaymentService(StarsProvider())
+            with span("payment.settle") as settle:
+                _, created = await service.settle_payment(
+                    session,
+                    intent,
+                    provider_payment_id=payment_data.telegram_payment_charge_id,
+                    raw=payment_data.model_dump(),
+                )
+                await session.commit()
+                settle.set(duplicate=not created)
     await ensure_root(bot, message.chat.id, message.from_user.id, PAYMENT_SUCCESS_TEXT, back_home_keyboard())
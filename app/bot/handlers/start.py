@@ -6,6 +6,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
+from app.bot.middlewares import LazyUserSnapshot
 from app.bot.ui import callbacks
 from app.bot.ui.keyboards import admin_keyboard, back_home_keyboard, buy_keyboard, home_keyboard, support_keyboard
 from app.bot.ui.render import ensure_root, sync_root
@@ -27,16 +28,14 @@ from app.bot.ui.texts import (
     TERMS_TEXT,
     TRIAL_USED_TEXT,
 )
+from app.catalog.cache import get_location, get_page, get_plan, list_active_plans, list_locations
 from app.common.config import settings
 from app.common.redis import rate_limit, user_lock
 from app.common.time import utcnow
 from app.db.models import JobOutbox
-from app.db.repos.content import get_page
-from app.db.repos.jobs import enqueue_job_safe
-from app.db.repos.locations import list_locations
-from app.db.repos.plans import get_plan, list_active_plans
+from app.db.repos.broadcasts import SEGMENTS, cancel_broadcast, create_broadcast, list_broadcasts
+from app.db.repos.jobs import enqueue_job_safe, enqueue_jobs_bulk
 from app.db.repos.promo import get_promo, has_redemption, count_redemptions
-from app.db.repos.subscriptions import get_subscription, list_user_subscriptions
 from app.db.repos.tickets import (
     add_message,
     create_ticket,
@@ -47,6 +46,7 @@ from app.db.repos.tickets import (
 )
 from app.db.repos.users import create_user, get_user, get_user_by_ref_code, mark_trial_used, set_adguard
 from app.db.session import SessionLocal
+from app.notifications.broadcast import broadcast_job
 from app.payments.providers.stars import StarsProvider
 from app.payments.service import PaymentService
 
@@ -58,6 +58,7 @@ class UserFlow(StatesGroup):
     awaiting_support_message = State()
     awaiting_ticket_reply = State()
     awaiting_admin_reply = State()
+    awaiting_broadcast_text = State()
 
 
 @router.message(CommandStart())
@@ -81,6 +82,7 @@ async def start_handler(message: Message, bot: Bot, state: FSMContext) -> None:
                     if ref_user:
                         referrer_id = ref_user.tg_id
                 user = await create_user(session, message.from_user.id, message.from_user.username, referrer_id)
+                await session.commit()
     await state.clear()
     await ensure_root(
         bot,
@@ -115,15 +117,13 @@ def _format_buy_summary(plan, location, amount, discount, free_days) -> str:
 
 
 async def _render_content_page(bot: Bot, chat_id: int, user_id: int, key: str, fallback_text: str) -> None:
-    async with SessionLocal() as session:
-        page = await get_page(session, key)
-        text = f"{page.title}\n\n{page.body_md}" if page else fallback_text
+    page = await get_page(key)
+    text = f"{page.title}\n\n{page.body_md}" if page else fallback_text
     await ensure_root(bot, chat_id, user_id, text, back_home_keyboard())
 
 
 async def _render_plan_list(bot: Bot, chat_id: int, user_id: int) -> None:
-    async with SessionLocal() as session:
-        plans = await list_active_plans(session)
+    plans = await list_active_plans()
     buttons = [
         [InlineKeyboardButton(text=f"{plan.title} • {plan.price_stars}⭐", callback_data=callbacks.pack(callbacks.BUY_PLAN, plan.plan_code))]
         for plan in plans
@@ -139,11 +139,16 @@ async def _render_plan_list(bot: Bot, chat_id: int, user_id: int) -> None:
 
 
 @router.callback_query()
-async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) -> None:
+async def callback_handler(
+    query: CallbackQuery,
+    bot: Bot,
+    state: FSMContext,
+    user_snapshot: LazyUserSnapshot,
+) -> None:
     await query.answer("Готово")
     if not query.message or not query.from_user:
         return
-    sync_root(query.from_user.id, query.message.message_id)
+    await sync_root(query.from_user.id, query.message.message_id)
     action, parts = callbacks.parse(query.data)
     user_id = query.from_user.id
     chat_id = query.message.chat.id
@@ -163,8 +168,7 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
             return
         plan_code = parts[0]
         await state.update_data(plan_code=plan_code)
-        async with SessionLocal() as session:
-            locations = await list_locations(session)
+        locations = await list_locations()
         buttons = [
             [InlineKeyboardButton(text=loc.title, callback_data=callbacks.pack(callbacks.BUY_LOCATION, loc.code))]
             for loc in locations
@@ -185,15 +189,14 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
         location_code = parts[0]
         data = await state.get_data()
         await state.update_data(location_code=location_code)
-        async with SessionLocal() as session:
-            user = await get_user(session, user_id)
-            plan = await get_plan(session, data.get("plan_code")) if data.get("plan_code") else None
-            location = next((loc for loc in await list_locations(session) if loc.code == location_code), None)
+        snapshot = await user_snapshot.get()
+        plan = await get_plan(data["plan_code"]) if data.get("plan_code") else None
+        location = await get_location(location_code)
         amount = plan.price_stars if plan else 0
         discount = data.get("discount_stars", 0)
         free_days = data.get("free_days", 0)
         summary = _format_buy_summary(plan, location, max(amount - discount, 1), discount, free_days)
-        include_trial = user is not None and user.trial_used_at is None
+        include_trial = snapshot.trial_available
         await ensure_root(bot, chat_id, user_id, summary, buy_keyboard(include_trial))
         return
 
@@ -225,6 +228,7 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
             )
             await enqueue_job_safe(session, job)
             await mark_trial_used(session, user_id, utcnow())
+            await session.commit()
         await ensure_root(bot, chat_id, user_id, PAYMENT_SUCCESS_TEXT, back_home_keyboard())
         return
 
@@ -233,12 +237,12 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
         if not data.get("plan_code") or not data.get("location_code"):
             await ensure_root(bot, chat_id, user_id, "Сначала выберите тариф и локацию.", back_home_keyboard())
             return
+        plan = await get_plan(data["plan_code"])
+        location = await get_location(data["location_code"])
+        if not plan or not location:
+            await ensure_root(bot, chat_id, user_id, "Не удалось загрузить тариф или локацию.", back_home_keyboard())
+            return
         async with SessionLocal() as session:
-            plan = await get_plan(session, data["plan_code"])
-            location = next((loc for loc in await list_locations(session) if loc.code == data["location_code"]), None)
-            if not plan or not location:
-                await ensure_root(bot, chat_id, user_id, "Не удалось загрузить тариф или локацию.", back_home_keyboard())
-                return
             discount = int(data.get("discount_stars", 0))
             amount = max(plan.price_stars - discount, 1)
             service = PaymentService(StarsProvider())
@@ -250,9 +254,8 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
                 location_code=location.code,
                 amount_stars=amount,
                 promo_code_id=data.get("promo_code_id"),
+                meta={"free_days": int(data["free_days"])} if data.get("free_days") else None,
             )
-            if data.get("free_days"):
-                intent.meta["free_days"] = int(data["free_days"])
             await session.commit()
             invoice = service.provider.create_invoice(str(intent.id), amount, f"{plan.title} • {location.title}")
         await bot.send_invoice(
@@ -268,8 +271,7 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
         return
 
     if action == callbacks.SUBSCRIPTIONS:
-        async with SessionLocal() as session:
-            subs = await list_user_subscriptions(session, user_id)
+        subs = (await user_snapshot.get()).subscriptions
         if not subs:
             await ensure_root(bot, chat_id, user_id, "Подписок пока нет.", back_home_keyboard())
             return
@@ -288,8 +290,7 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
 
     if action == callbacks.SUB_VIEW and parts:
         sub_id = int(parts[0])
-        async with SessionLocal() as session:
-            sub = await get_subscription(session, sub_id, user_id)
+        sub = (await user_snapshot.get()).subscription(sub_id)
         if not sub:
             await ensure_root(bot, chat_id, user_id, "Подписка не найдена.", back_home_keyboard())
             return
@@ -311,11 +312,10 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
 
     if action == callbacks.SUB_LINK and parts:
         sub_id = int(parts[0])
+        if not (await user_snapshot.get()).subscription(sub_id):
+            await ensure_root(bot, chat_id, user_id, "Подписка не найдена.", back_home_keyboard())
+            return
         async with SessionLocal() as session:
-            sub = await get_subscription(session, sub_id, user_id)
-            if not sub:
-                await ensure_root(bot, chat_id, user_id, "Подписка не найдена.", back_home_keyboard())
-                return
             job = JobOutbox(
                 job_type="send_notifications",
                 payload={"kind": "delivery_link", "user_id": user_id, "subscription_id": sub_id},
@@ -323,6 +323,7 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
                 idempotency_key=f"delivery:{sub_id}",
             )
             await enqueue_job_safe(session, job)
+            await session.commit()
         await ensure_root(bot, chat_id, user_id, "Запрос на ссылку принят. Ответ придёт в чат.", back_home_keyboard())
         return
 
@@ -331,8 +332,7 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
         return
 
     if action == callbacks.ADGUARD:
-        async with SessionLocal() as session:
-            user = await get_user(session, user_id)
+        user = (await user_snapshot.get()).user
         enabled = bool(user and user.adguard_enabled)
         text = ADGUARD_TEXT.format(primary=settings.adguard_dns_primary, secondary=settings.adguard_dns_secondary)
         toggle_text = "Отключить" if enabled else "Включить"
@@ -350,12 +350,12 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
             user = await get_user(session, user_id)
             if user:
                 await set_adguard(session, user_id, not user.adguard_enabled)
+                await session.commit()
         await ensure_root(bot, chat_id, user_id, "Настройка AdGuard обновлена.", back_home_keyboard())
         return
 
     if action == callbacks.REFERRAL:
-        async with SessionLocal() as session:
-            user = await get_user(session, user_id)
+        user = (await user_snapshot.get()).user
         bot_me = await bot.get_me()
         link = f"https://t.me/{bot_me.username}?start=ref_{user.ref_code}" if user else "-"
         await ensure_root(bot, chat_id, user_id, REFERRAL_TEXT.format(link=link), back_home_keyboard())
@@ -376,8 +376,7 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
         return
 
     if action == callbacks.SUPPORT_LIST:
-        async with SessionLocal() as session:
-            tickets = await list_tickets(session, user_id)
+        tickets = (await user_snapshot.get()).tickets
         if not tickets:
             await ensure_root(bot, chat_id, user_id, "Обращений пока нет.", back_home_keyboard())
             return
@@ -431,8 +430,44 @@ async def callback_handler(query: CallbackQuery, bot: Bot, state: FSMContext) ->
                 status="pending",
                 idempotency_key=f"{job_type}:{utcnow().date().isoformat()}",
             )
-            await enqueue_job_safe(session, job)
-        await ensure_root(bot, chat_id, user_id, "Задача поставлена в очередь.", back_home_keyboard())
+            report = await enqueue_jobs_bulk(session, [job])
+            await session.commit()
+        text = "Задача уже стоит в очереди за сегодня." if report.duplicates else "Задача поставлена в очередь."
+        await ensure_root(bot, chat_id, user_id, text, back_home_keyboard())
+        return
+
+    if action == callbacks.ADMIN_BROADCASTS and user_id in settings.admin_ids():
+        async with SessionLocal() as session:
+            broadcasts = await list_broadcasts(session)
+        lines = ["Рассылки:"] + [
+            f"#{item.id} • {item.segment} • {item.status}: отправлено {item.sent}, ошибок {item.failed}, заблокировали {item.blocked}"
+            for item in broadcasts
+        ]
+        buttons = [
+            [InlineKeyboardButton(text=f"➕ Новая ({segment})", callback_data=callbacks.pack(callbacks.ADMIN_BROADCAST_NEW, segment))]
+            for segment in SEGMENTS
+        ]
+        buttons += [
+            [InlineKeyboardButton(text=f"⛔ Остановить #{item.id}", callback_data=callbacks.pack(callbacks.ADMIN_BROADCAST_CANCEL, str(item.id)))]
+            for item in broadcasts
+            if item.status in {"pending", "running"}
+        ]
+        buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data=callbacks.HOME)])
+        await ensure_root(bot, chat_id, user_id, "\n".join(lines), InlineKeyboardMarkup(inline_keyboard=buttons))
+        return
+
+    if action == callbacks.ADMIN_BROADCAST_NEW and parts and parts[0] in SEGMENTS and user_id in settings.admin_ids():
+        await state.set_state(UserFlow.awaiting_broadcast_text)
+        await state.update_data(broadcast_segment=parts[0])
+        await ensure_root(bot, chat_id, user_id, "Введите текст рассылки одним сообщением.", back_home_keyboard())
+        return
+
+    if action == callbacks.ADMIN_BROADCAST_CANCEL and parts and user_id in settings.admin_ids():
+        async with SessionLocal() as session:
+            cancelled = await cancel_broadcast(session, int(parts[0]))
+            await session.commit()
+        text = "Рассылка остановлена." if cancelled else "Рассылка уже завершена."
+        await ensure_root(bot, chat_id, user_id, text, admin_keyboard())
         return
 
     if action == callbacks.ADMIN_TICKETS and user_id in settings.admin_ids():
@@ -504,7 +539,7 @@ async def promo_handler(message: Message, bot: Bot, state: FSMContext) -> None:
                 await state.clear()
                 return
         data = await state.get_data()
-        plan = await get_plan(session, data.get("plan_code")) if data.get("plan_code") else None
+        plan = await get_plan(data["plan_code"]) if data.get("plan_code") else None
         amount = plan.price_stars if plan else 0
         discount, free_days = _promo_discount(amount, promo)
         data.update(
@@ -534,6 +569,7 @@ async def support_message_handler(message: Message, bot: Bot, state: FSMContext)
     async with SessionLocal() as session:
         ticket = await create_ticket(session, message.from_user.id, status="open")
         await add_message(session, ticket.id, message.from_user.id, message.text.strip())
+        await session.commit()
     await state.clear()
     await ensure_root(bot, message.chat.id, message.from_user.id, f"Тикет #{ticket.id} создан.", support_keyboard())
 
@@ -552,10 +588,29 @@ async def support_reply_handler(message: Message, bot: Bot, state: FSMContext) -
             return
         await add_message(session, ticket_id, message.from_user.id, message.text.strip())
         await update_ticket_status(session, ticket, "open")
+        await session.commit()
     await state.clear()
     await ensure_root(bot, message.chat.id, message.from_user.id, "Сообщение отправлено в поддержку.", support_keyboard())
 
 
+@router.message(UserFlow.awaiting_broadcast_text)
+async def broadcast_text_handler(message: Message, bot: Bot, state: FSMContext) -> None:
+    if not message.text or message.from_user.id not in settings.admin_ids():
+        return
+    data = await state.get_data()
+    async with SessionLocal() as session:
+        broadcast = await create_broadcast(
+            session,
+            created_by=message.from_user.id,
+            segment=data.get("broadcast_segment", "all"),
+            text=message.text.strip(),
+        )
+        await enqueue_jobs_bulk(session, [broadcast_job(broadcast.id)])
+        await session.commit()
+    await state.clear()
+    await ensure_root(bot, message.chat.id, message.from_user.id, f"Рассылка #{broadcast.id} поставлена в очередь.", admin_keyboard())
+
+
 @router.message(UserFlow.awaiting_admin_reply)
 async def admin_reply_handler(message: Message, bot: Bot, state: FSMContext) -> None:
     if not message.text:
@@ -579,7 +634,8 @@ async def admin_reply_handler(message: Message, bot: Bot, state: FSMContext) ->
             status="pending",
             idempotency_key=f"support_reply:{ticket.id}:{message.message_id}",
         )
-        await enqueue_job_safe(session, job)
+        await enqueue_jobs_bulk(session, [job])
+        await session.commit()
     await state.clear()
     await ensure_root(bot, message.chat.id, message.from_user.id, "Ответ отправлен пользователю.", admin_keyboard())
     if action == callbacks.ADMIN_TICKET_REPLY and parts and user_id in settings.admin_ids():
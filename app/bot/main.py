@@ -5,28 +5,72 @@ import logging
 
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 
 from app.bot.handlers.payments import router as payments_router
 from app.bot.handlers.start import router as start_router
+from app.bot.middlewares import RateLimitMiddleware, UpdateMetricsMiddleware, UserSnapshotMiddleware
+from app.bot.stream import run_consumers
+from app.bot.ui.render import root_hint_middleware
+from app.catalog.cache import listen_catalog_invalidations
 from app.common.config import settings
 from app.common.logging import setup_logging
+from app.common.metrics import start_metrics_server
+from app.common.redis import get_redis
+from app.common.tracing import close_tracing
+from app.integrations.remnawave.client import close_http_client
+
+
+def build_dispatcher() -> Dispatcher:
+    storage = RedisStorage(
+        get_redis(),
+        key_builder=DefaultKeyBuilder(prefix="fsm"),
+        state_ttl=settings.bot_fsm_ttl_seconds,
+        data_ttl=settings.bot_fsm_ttl_seconds,
+    )
+    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(root_hint_middleware)
+    dp.update.outer_middleware(UserSnapshotMiddleware())
+    update_metrics = UpdateMetricsMiddleware()
+    dp.message.outer_middleware(update_metrics)
+    dp.callback_query.outer_middleware(update_metrics)
+    dp.pre_checkout_query.outer_middleware(update_metrics)
+    rate_limiter = RateLimitMiddleware()
+    dp.message.outer_middleware(rate_limiter)
+    dp.callback_query.outer_middleware(rate_limiter)
+    dp.include_router(start_router)
+    dp.include_router(payments_router)
+    return dp
 
 
 async def main() -> None:
     setup_logging()
     logger = logging.getLogger("bot")
     bot = Bot(token=settings.read_secret(settings.bot_token_file), parse_mode=ParseMode.HTML)
-    dp = Dispatcher(storage=MemoryStorage())
-    dp.include_router(start_router)
-    dp.include_router(payments_router)
-    logger.info("bot_started")
-    while True:
-        try:
-            await dp.start_polling(bot)
-        except Exception as exc:
-            logger.error("bot_polling_error", extra={"extra": {"error": str(exc)}})
-            await asyncio.sleep(5)
+    dp = build_dispatcher()
+    start_metrics_server()
+    logger.info("bot_started", extra={"extra": {"mode": settings.bot_mode}})
+    catalog_listener = asyncio.create_task(listen_catalog_invalidations())
+    try:
+        if settings.bot_mode == "webhook":
+            await bot.set_webhook(
+                url=f"{settings.bot_webhook_url.rstrip('/')}{settings.bot_webhook_path}",
+                secret_token=settings.read_secret(settings.bot_webhook_secret_file),
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+            await run_consumers(dp, bot)
+            return
+        while True:
+            try:
+                await bot.delete_webhook()
+                await dp.start_polling(bot)
+            except Exception as exc:
+                logger.error("bot_polling_error", extra={"extra": {"error": str(exc)}})
+                await asyncio.sleep(5)
+    finally:
+        catalog_listener.cancel()
+        await close_http_client()
+        close_tracing()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.enums import ContentType
+from aiogram.types import CallbackQuery, Message, TelegramObject, User
+
+from app.bot.ui import callbacks
+from app.common.config import settings
+from app.common.metrics import BOT_UPDATE_LATENCY
+from app.common.redis import Bucket, take_tokens
+from app.db.repos.users import UserSnapshot, load_user_snapshot
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("bot.middlewares")
+
+CALLBACK_ACTIONS = {value for name, value in vars(callbacks).items() if name.isupper() and isinstance(value, str)}
+USER_CONTENT_TYPES = {
+    ContentType.TEXT,
+    ContentType.ANIMATION,
+    ContentType.AUDIO,
+    ContentType.DOCUMENT,
+    ContentType.PHOTO,
+    ContentType.STICKER,
+    ContentType.STORY,
+    ContentType.VIDEO,
+    ContentType.VIDEO_NOTE,
+    ContentType.VOICE,
+    ContentType.CONTACT,
+    ContentType.DICE,
+    ContentType.GAME,
+    ContentType.POLL,
+    ContentType.VENUE,
+    ContentType.LOCATION,
+}
+
+
+class LazyUserSnapshot:
+    def __init__(self, tg_id: int | None) -> None:
+        self.tg_id = tg_id
+        self._snapshot: UserSnapshot | None = None
+
+    async def get(self) -> UserSnapshot:
+        if self._snapshot is None:
+            if self.tg_id is None:
+                self._snapshot = UserSnapshot(user=None)
+            else:
+                async with SessionLocal() as session:
+                    self._snapshot = await load_user_snapshot(session, self.tg_id)
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+
+class UserSnapshotMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        data["user_snapshot"] = LazyUserSnapshot(user.id if user else None)
+        return await handler(event, data)
+
+
+class RateLimitMiddleware(BaseMiddleware):
+    def __init__(self) -> None:
+        self.actions = settings.rate_limit_actions()
+
+    def _buckets(self, event: TelegramObject, user_id: int) -> list[Bucket]:
+        buckets = [
+            Bucket("rl:global", settings.rate_limit_global_per_second, settings.rate_limit_global_burst),
+            Bucket(f"rl:user:{user_id}", settings.rate_limit_user_per_second, settings.rate_limit_user_burst),
+        ]
+        action = None
+        if isinstance(event, CallbackQuery) and event.data:
+            action, _ = callbacks.parse(event.data)
+        elif isinstance(event, Message) and event.text and event.text.startswith("/"):
+            action = event.text[1:].split(maxsplit=1)[0].split("@", 1)[0]
+        if action in self.actions:
+            rate, burst = self.actions[action]
+            buckets.append(Bucket(f"rl:action:{action}:{user_id}", rate, burst))
+        return buckets
+
+    def _exempt(self, event: TelegramObject) -> bool:
+        if not isinstance(event, Message):
+            return False
+        return event.successful_payment is not None or event.content_type not in USER_CONTENT_TYPES
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if (
+            not settings.rate_limit_enabled
+            or user is None
+            or user.id in settings.admin_ids()
+            or self._exempt(event)
+        ):
+            return await handler(event, data)
+        try:
+            wait = await take_tokens(self._buckets(event, user.id))
+        except Exception as exc:
+            logger.error("rate_limit_error", extra={"extra": {"error": str(exc)}})
+            return await handler(event, data)
+        if wait:
+            logger.info("rate_limited", extra={"extra": {"user_id": user.id, "wait": round(wait, 2)}})
+            if isinstance(event, CallbackQuery):
+                await event.answer("Слишком часто. Попробуйте через пару секунд.")
+            return None
+        return await handler(event, data)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, CallbackQuery):
+            action, _ = callbacks.parse(event.data or "")
+            action = action if action in CALLBACK_ACTIONS else "other"
+        elif isinstance(event, Message):
+            action = "command" if event.text and event.text.startswith("/") else "message"
+        else:
+            action = type(event).__name__.lower()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            BOT_UPDATE_LATENCY.labels(action=action).observe(time.perf_counter() - started)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from pydantic import ValidationError
+from redis.exceptions import ResponseError
+
+from app.common.config import settings
+from app.common.redis import get_redis
+
+logger = logging.getLogger("bot.stream")
+
+CONSUMER_PREFIX = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def ensure_group() -> None:
+    try:
+        await get_redis().xgroup_create(settings.bot_update_stream, settings.bot_update_group, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+async def _ack(entry_id: str) -> None:
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.xack(settings.bot_update_stream, settings.bot_update_group, entry_id)
+        pipe.xdel(settings.bot_update_stream, entry_id)
+        await pipe.execute()
+
+
+async def _dead_letter(entry_id: str, fields: dict, error: str, deliveries: int) -> None:
+    await get_redis().xadd(
+        settings.bot_update_dead_letter_stream,
+        {"update": fields["update"], "entry_id": entry_id, "error": error[:2000], "deliveries": deliveries},
+    )
+    await _ack(entry_id)
+    logger.error("bot_update_dead_lettered", extra={"extra": {"entry_id": entry_id, "deliveries": deliveries}})
+
+
+async def _handle(dp: Dispatcher, bot: Bot, entries: list, deliveries: dict[str, int] | None = None) -> None:
+    for entry_id, fields in entries:
+        if not fields or "update" not in fields:
+            await _ack(entry_id)
+            continue
+        attempt = (deliveries or {}).get(entry_id, 1)
+        try:
+            update = Update.model_validate_json(fields["update"], context={"bot": bot})
+        except ValidationError as exc:
+            await _dead_letter(entry_id, fields, str(exc), attempt)
+            continue
+        try:
+            await dp.feed_update(bot, update)
+        except Exception as exc:
+            logger.error("bot_update_error", extra={"extra": {"entry_id": entry_id, "deliveries": attempt, "error": str(exc)}})
+            if attempt >= settings.bot_update_max_deliveries:
+                await _dead_letter(entry_id, fields, str(exc), attempt)
+            continue
+        await _ack(entry_id)
+
+
+async def _delivery_counts(entries: list) -> dict[str, int]:
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for entry_id, _ in entries:
+            pipe.xpending_range(settings.bot_update_stream, settings.bot_update_group, min=entry_id, max=entry_id, count=1)
+        results = await pipe.execute()
+    return {item["message_id"]: item["times_delivered"] for pending in results for item in pending}
+
+
+async def _reclaim(dp: Dispatcher, bot: Bot, consumer: str) -> int:
+    _, entries, *_ = await get_redis().xautoclaim(
+        settings.bot_update_stream,
+        settings.bot_update_group,
+        consumer,
+        min_idle_time=settings.bot_update_claim_idle_ms,
+        start_id="0-0",
+        count=settings.bot_update_batch_size,
+    )
+    if entries:
+        logger.info("bot_updates_reclaimed", extra={"extra": {"consumer": consumer, "count": len(entries)}})
+        await _handle(dp, bot, entries, await _delivery_counts(entries))
+    return len(entries)
+
+
+async def consume(dp: Dispatcher, bot: Bot, consumer: str) -> None:
+    redis = get_redis()
+    next_reclaim = 0.0
+    while True:
+        try:
+            if time.monotonic() >= next_reclaim:
+                reclaimed = await _reclaim(dp, bot, consumer)
+                next_reclaim = 0.0 if reclaimed else time.monotonic() + settings.bot_update_claim_idle_ms / 1000
+            response = await redis.xreadgroup(
+                settings.bot_update_group,
+                consumer,
+                {settings.bot_update_stream: ">"},
+                count=settings.bot_update_batch_size,
+                block=5000,
+            )
+            if not response:
+                next_reclaim = 0.0
+                continue
+            for _, entries in response:
+                await _handle(dp, bot, entries)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("bot_consumer_error", extra={"extra": {"consumer": consumer, "error": str(exc)}})
+            await asyncio.sleep(1)
+
+
+async def run_consumers(dp: Dispatcher, bot: Bot) -> None:
+    await ensure_group()
+    workers = max(1, settings.bot_update_workers)
+    logger.info("bot_consumers_started", extra={"extra": {"workers": workers, "stream": settings.bot_update_stream}})
+    await asyncio.gather(*(consume(dp, bot, f"{CONSUMER_PREFIX}:{i}") for i in range(workers)))
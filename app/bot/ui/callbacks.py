@@ -34,6 +34,9 @@ ADMIN_TICKET_REPLY = "admin_ticket_reply"
 ADMIN_SYNC_SERVERS = "admin_sync_servers"
 ADMIN_SYNC_USERS = "admin_sync_users"
 ADMIN_RECONCILE = "admin_reconcile"
+ADMIN_BROADCASTS = "admin_broadcasts"
+ADMIN_BROADCAST_NEW = "admin_broadcast_new"
+ADMIN_BROADCAST_CANCEL = "admin_broadcast_cancel"
 
 ADGUARD_TOGGLE = "adguard_toggle"
 
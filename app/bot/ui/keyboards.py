@@ -63,6 +63,7 @@ def admin_keyboard() -> InlineKeyboardMarkup:
             [InlineKeyboardButton(text="🔄 Sync servers", callback_data=callbacks.ADMIN_SYNC_SERVERS)],
             [InlineKeyboardButton(text="🔄 Sync users", callback_data=callbacks.ADMIN_SYNC_USERS)],
             [InlineKeyboardButton(text="🧹 Reconcile", callback_data=callbacks.ADMIN_RECONCILE)],
+            [InlineKeyboardButton(text="📣 Рассылки", callback_data=callbacks.ADMIN_BROADCASTS)],
             [InlineKeyboardButton(text="⬅️ Главное меню", callback_data=callbacks.HOME)],
         ]
     )
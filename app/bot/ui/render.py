@@ -1,9 +1,42 @@
 from __future__ import annotations
 
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
 from aiogram import Bot
-from aiogram.types import Message
+from aiogram.exceptions import TelegramBadRequest
+
+from app.common.config import settings
+from app.common.redis import get_redis
+
+_root_hint: ContextVar[tuple[int, int] | None] = ContextVar("root_hint", default=None)
+
+
+async def root_hint_middleware(
+    handler: Callable[[Any, dict[str, Any]], Awaitable[Any]],
+    event: Any,
+    data: dict[str, Any],
+) -> Any:
+    token = _root_hint.set(None)
+    try:
+        return await handler(event, data)
+    finally:
+        _root_hint.reset(token)
+
+
+def _root_key(user_id: int) -> str:
+    return f"root:{user_id}"
+
 
-ROOT_MESSAGE: dict[int, int] = {}
+async def _get_root(user_id: int) -> int | None:
+    hint = _root_hint.get()
+    if hint and hint[0] == user_id:
+        return hint[1]
+    value = await get_redis().getex(_root_key(user_id), ex=settings.bot_root_ttl_seconds)
+    if value is None:
+        return None
+    _root_hint.set((user_id, int(value)))
+    return int(value)
 
 
 async def ensure_root(
@@ -13,14 +46,22 @@ async def ensure_root(
     text: str,
     reply_markup: object | None = None,
 ) -> int:
-    if user_id in ROOT_MESSAGE:
-        message_id = ROOT_MESSAGE[user_id]
-        await bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
-        return message_id
+    message_id = await _get_root(user_id)
+    if message_id is not None:
+        try:
+            await bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
+            return message_id
+        except TelegramBadRequest as exc:
+            if "message is not modified" in exc.message:
+                return message_id
     sent = await bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
-    ROOT_MESSAGE[user_id] = sent.message_id
+    await sync_root(user_id, sent.message_id)
     return sent.message_id
 
 
-def sync_root(user_id: int, message_id: int) -> None:
-    ROOT_MESSAGE[user_id] = message_id
+async def sync_root(user_id: int, message_id: int) -> None:
+    hint = _root_hint.get()
+    if hint == (user_id, message_id):
+        return
+    _root_hint.set((user_id, message_id))
+    await get_redis().set(_root_key(user_id), message_id, ex=settings.bot_root_ttl_seconds)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from app.common.config import settings
+from app.common.redis import get_redis
+from app.db.models import ContentPage, Location, Plan, PlanLocationMapping
+from app.db.repos.content import list_pages
+from app.db.repos.locations import list_active_mappings, list_locations as load_locations
+from app.db.repos.plans import list_plans
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("catalog")
+
+CATALOG_CHANNEL = "catalog:invalidate"
+
+
+@dataclass
+class Catalog:
+    plans: dict[str, Plan]
+    locations: list[Location]
+    mappings: dict[tuple[str, str], PlanLocationMapping]
+    pages: dict[str, ContentPage]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def fresh(self) -> bool:
+        return time.monotonic() - self.loaded_at < settings.catalog_ttl_seconds
+
+
+_catalog: Catalog | None = None
+_generation = 0
+_load_lock = asyncio.Lock()
+
+
+async def _load() -> Catalog:
+    async with SessionLocal() as session:
+        plans = await list_plans(session)
+        locations = await load_locations(session)
+        mappings = await list_active_mappings(session)
+        pages = await list_pages(session)
+    return Catalog(
+        plans={plan.plan_code: plan for plan in plans},
+        locations=locations,
+        mappings={(mapping.plan_code, mapping.location_code): mapping for mapping in mappings},
+        pages={page.key: page for page in pages},
+    )
+
+
+async def get_catalog(refresh: bool = False) -> Catalog:
+    global _catalog
+    catalog = _catalog
+    if catalog is not None and catalog.fresh() and not refresh:
+        return catalog
+    async with _load_lock:
+        if _catalog is not None and _catalog is not catalog and _catalog.fresh():
+            return _catalog
+        generation = _generation
+        loaded = await _load()
+        if generation == _generation:
+            _catalog = loaded
+        logger.info("catalog_loaded", extra={"extra": {"plans": len(loaded.plans), "mappings": len(loaded.mappings)}})
+        return loaded
+
+
+def invalidate_catalog() -> None:
+    global _catalog, _generation
+    _catalog = None
+    _generation += 1
+
+
+async def publish_catalog_invalidation() -> None:
+    invalidate_catalog()
+    await get_redis().publish(CATALOG_CHANNEL, "1")
+
+
+async def listen_catalog_invalidations() -> None:
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            await pubsub.subscribe(CATALOG_CHANNEL)
+            invalidate_catalog()
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    invalidate_catalog()
+                    logger.info("catalog_invalidated")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("catalog_listener_error", extra={"extra": {"error": str(exc)}})
+            await asyncio.sleep(5)
+        finally:
+            await pubsub.aclose()
+
+
+async def list_active_plans() -> list[Plan]:
+    catalog = await get_catalog()
+    return [plan for plan in catalog.plans.values() if plan.is_active]
+
+
+async def get_plan(plan_code: str) -> Plan | None:
+    return (await get_catalog()).plans.get(plan_code)
+
+
+async def list_locations() -> list[Location]:
+    return (await get_catalog()).locations
+
+
+async def get_location(code: str) -> Location | None:
+    return next((loc for loc in await list_locations() if loc.code == code), None)
+
+
+async def get_mapping(plan_code: str, location_code: str) -> PlanLocationMapping | None:
+    mapping = (await get_catalog()).mappings.get((plan_code, location_code))
+    if mapping is None:
+        mapping = (await get_catalog(refresh=True)).mappings.get((plan_code, location_code))
+    return mapping
+
+
+async def get_page(key: str) -> ContentPage | None:
+    return (await get_catalog()).pages.get(key)
@@ -19,7 +19,47 @@ class Settings(BaseSettings):
     bot_token_file: str
     admin_tg_ids: str
     database_url: str
+    service_name: str = ""
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = False
+    db_statement_cache_size: int = 500
+    db_profiles_json: str = (
+        '{"api": {"pool_size": 5, "max_overflow": 5}, '
+        '"bot": {"pool_size": 10, "max_overflow": 5}, '
+        '"worker": {"pool_size": 12, "max_overflow": 4}}'
+    )
     redis_url: str
+    bot_fsm_ttl_seconds: int = 86400
+    catalog_ttl_seconds: float = 300.0
+    metrics_port: int = 9100
+    trace_export_path: str = ""
+    telegram_global_per_second: float = 25.0
+    telegram_global_burst: float = 25.0
+    telegram_chat_per_second: float = 1.0
+    telegram_chat_burst: float = 1.0
+    telegram_max_wait_seconds: float = 5.0
+    rate_limit_enabled: bool = True
+    rate_limit_global_per_second: float = 100.0
+    rate_limit_global_burst: float = 300.0
+    rate_limit_user_per_second: float = 1.0
+    rate_limit_user_burst: float = 8.0
+    rate_limit_actions_json: str = '{"buy_pay": [0.1, 3], "buy_trial": [0.05, 2], "sub_link": [0.1, 3], "start": [0.2, 3]}'
+    bot_root_ttl_seconds: int = 604800
+    bot_mode: str = "polling"
+    bot_webhook_url: str = ""
+    bot_webhook_path: str = "/webhooks/telegram"
+    bot_webhook_secret_file: str = ""
+    bot_update_stream: str = "bot:updates"
+    bot_update_group: str = "bot"
+    bot_update_stream_max_backlog: int = 50000
+    bot_update_workers: int = 4
+    bot_update_batch_size: int = 10
+    bot_update_claim_idle_ms: int = 60000
+    bot_update_max_deliveries: int = 5
+    bot_update_dead_letter_stream: str = "bot:updates:dead"
 
     remnawave_base_url: str
     remnawave_token_file: str
@@ -28,6 +68,20 @@ class Settings(BaseSettings):
     remnawave_webhook_secret_file: str
     remnawave_api_mode: str = "strict"
     remnawave_endpoint_overrides_json: str = "{}"
+    remnawave_http2: bool = False
+    remnawave_max_connections: int = 20
+    remnawave_max_keepalive_connections: int = 10
+    remnawave_keepalive_expiry_seconds: float = 30.0
+    remnawave_timeout_seconds: float = 10.0
+    remnawave_endpoint_timeouts_json: str = "{}"
+    remnawave_max_attempts: int = 3
+    remnawave_sync_page_size: int = 500
+    remnawave_backoff_base_seconds: float = 0.5
+    remnawave_backoff_max_seconds: float = 5.0
+    remnawave_breaker_failure_threshold: int = 5
+    remnawave_breaker_reset_seconds: float = 30.0
+    remnawave_retry_budget_ratio: float = 0.2
+    remnawave_retry_budget_min_per_second: float = 1.0
 
     hzn_profile_classic_uuid: str
     hzn_profile_premium_uuid: str
@@ -42,6 +96,21 @@ class Settings(BaseSettings):
     cabinet_public_url: str = ""
     cabinet_jwt_secret_file: str = ""
 
+    worker_id: str = ""
+    worker_batch_size: int = 50
+    worker_lease_seconds: int = 300
+    worker_concurrency: int = 8
+    worker_poll_min_seconds: float = 0.5
+    worker_poll_max_seconds: float = 30.0
+    worker_poll_fallback_seconds: float = 5.0
+    worker_job_type_limits_json: str = '{"archive_jobs": 1, "broadcast": 1, "reconcile": 1, "sync_servers": 1, "sync_users": 1}'
+    jobs_retention_days: int = 7
+    jobs_archive_retention_days: int = 90
+    jobs_archive_batch_size: int = 5000
+    jobs_archive_interval_seconds: int = 3600
+    broadcast_window_size: int = 5000
+    broadcast_chunk_size: int = 25
+
     notifications_enabled: bool = True
     maintenance_mode: bool = False
 
@@ -60,5 +129,63 @@ class Settings(BaseSettings):
             return {}
         return {str(k): str(v) for k, v in data.items()}
 
+    def remnawave_endpoint_timeouts(self) -> Dict[str, float]:
+        try:
+            data = json.loads(self.remnawave_endpoint_timeouts_json or "{}")
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        timeouts: Dict[str, float] = {}
+        for key, value in data.items():
+            try:
+                timeouts[str(key)] = float(value)
+            except (TypeError, ValueError):
+                continue
+        return timeouts
+
+    def worker_job_type_limits(self) -> Dict[str, int]:
+        try:
+            data = json.loads(self.worker_job_type_limits_json or "{}")
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {str(k): int(v) for k, v in data.items() if str(v).isdigit() and int(v) > 0}
+
+    def rate_limit_actions(self) -> Dict[str, tuple[float, float]]:
+        try:
+            data = json.loads(self.rate_limit_actions_json or "{}")
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        actions: Dict[str, tuple[float, float]] = {}
+        for key, value in data.items():
+            try:
+                rate, burst = value
+                actions[str(key)] = (float(rate), float(burst))
+            except (TypeError, ValueError):
+                continue
+        return actions
+
+    def db_engine_profile(self, service: str | None = None) -> Dict[str, Any]:
+        profile: Dict[str, Any] = {
+            "pool_size": self.db_pool_size,
+            "max_overflow": self.db_max_overflow,
+            "pool_timeout": self.db_pool_timeout_seconds,
+            "pool_recycle": self.db_pool_recycle_seconds,
+            "pool_pre_ping": self.db_pool_pre_ping,
+            "statement_cache_size": self.db_statement_cache_size,
+        }
+        try:
+            data = json.loads(self.db_profiles_json or "{}")
+        except json.JSONDecodeError:
+            return profile
+        overrides = data.get(service or self.service_name) if isinstance(data, dict) else None
+        if isinstance(overrides, dict):
+            profile.update({key: value for key, value in overrides.items() if key in profile})
+        return profile
+
 
 settings = Settings()
@@ -11,3 +11,13 @@ class RemnawaveEndpointError(HorizonError):
 
 class PaymentError(HorizonError):
     pass
+
+
+class JobDeferredError(HorizonError):
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RemnawaveUnavailableError(JobDeferredError):
+    pass
@@ -6,6 +6,8 @@ import sys
 from datetime import datetime, timezone
 from typing import Any, Dict
 
+from app.common.tracing import current_trace_id
+
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
@@ -15,6 +17,9 @@ class JsonFormatter(logging.Formatter):
             "logger": record.name,
             "message": record.getMessage(),
         }
+        trace_id = current_trace_id()
+        if trace_id:
+            payload["trace_id"] = trace_id
         if hasattr(record, "extra") and isinstance(record.extra, dict):
             payload.update(record.extra)
         return json.dumps(payload, ensure_ascii=False)
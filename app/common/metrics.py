@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.common.config import settings
+
+JOBS_DEPTH = Gauge("horizon_jobs", "Outbox jobs by status and type", ["status", "job_type"])
+JOB_LATENCY = Histogram(
+    "horizon_job_claim_to_done_seconds",
+    "Time from claim to completion of a job",
+    ["job_type"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800),
+)
+JOB_OUTCOMES = Counter("horizon_job_outcomes_total", "Job outcomes", ["job_type", "outcome"])
+REMNAWAVE_LATENCY = Histogram(
+    "horizon_remnawave_request_seconds",
+    "Remnawave request latency per attempt",
+    ["endpoint", "status"],
+)
+DB_CONNECTION_HELD = Histogram(
+    "horizon_db_connection_held_seconds",
+    "Time a pooled DB connection stays checked out",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10, 60),
+)
+DB_POOL_ACQUIRE = Histogram(
+    "horizon_db_pool_acquire_seconds",
+    "Time to get a pooled DB connection: queue wait plus opening new connections and pre-ping",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+DB_CONNECT_LATENCY = Histogram(
+    "horizon_db_connect_seconds",
+    "Time to open a new DB connection",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+DB_POOL_CONNECTIONS = Gauge("horizon_db_pool_connections", "DB pool connections by state", ["state"])
+BOT_UPDATE_LATENCY = Histogram(
+    "horizon_bot_update_seconds",
+    "Bot update handling latency",
+    ["action"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    pool = engine.sync_engine.pool
+    DB_POOL_CONNECTIONS.labels(state="size").set_function(pool.size)
+    DB_POOL_CONNECTIONS.labels(state="checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels(state="idle").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels(state="overflow").set_function(lambda: max(pool.overflow(), 0))
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def _do_connect(dialect, connection_record, cargs, cparams) -> None:
+        connection_record.info["connect_started_at"] = time.perf_counter()
+
+    @event.listens_for(pool, "connect")
+    def _connect(dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("connect_started_at", None)
+        if started is not None:
+            DB_CONNECT_LATENCY.observe(time.perf_counter() - started)
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            DB_CONNECTION_HELD.observe(time.perf_counter() - started)
+
+
+def start_metrics_server() -> None:
+    if settings.metrics_port:
+        start_http_server(settings.metrics_port)
@@ -2,14 +2,68 @@ from __future__ import annotations
 
 import contextlib
 import uuid
-from typing import AsyncIterator
+from dataclasses import dataclass
+from typing import AsyncIterator, Sequence
 
 import redis.asyncio as redis
+from redis.commands.core import AsyncScript
 
 from app.common.config import settings
 
 
 _redis: redis.Redis | None = None
+_token_bucket: AsyncScript | None = None
+_drain_bucket: AsyncScript | None = None
+
+TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 2])
+    local burst = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    available = math.min(burst, available + math.max(0, now - ts) / 1000 * rate)
+    if available < cost then
+        wait = math.max(wait, (cost - available) / rate)
+    end
+    tokens[i] = available
+end
+if wait > 0 then
+    return {0, tostring(wait)}
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 2])
+    local burst = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i] - cost), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return {1, '0'}
+"""
+
+
+DRAIN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local seconds = tonumber(ARGV[2])
+redis.call('HSET', KEYS[1], 'tokens', tostring(-rate * seconds), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(seconds * 1000 + tonumber(ARGV[3]) / rate * 1000) + 1000)
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class Bucket:
+    key: str
+    rate: float
+    burst: float
+    cost: float = 1
 
 
 def get_redis() -> redis.Redis:
@@ -33,8 +87,24 @@ async def user_lock(user_id: int, ttl: int = 10) -> AsyncIterator[bool]:
             await client.delete(lock_key)
 
 
+async def take_tokens(buckets: Sequence[Bucket]) -> float:
+    global _token_bucket
+    if _token_bucket is None:
+        _token_bucket = get_redis().register_script(TOKEN_BUCKET_LUA)
+    args: list[float] = []
+    for bucket in buckets:
+        args.extend((bucket.rate, bucket.burst, bucket.cost))
+    allowed, wait = await _token_bucket(keys=[bucket.key for bucket in buckets], args=args)
+    return 0.0 if int(allowed) else float(wait)
+
+
+async def drain_bucket(bucket: Bucket, seconds: float) -> None:
+    global _drain_bucket
+    if _drain_bucket is None:
+        _drain_bucket = get_redis().register_script(DRAIN_BUCKET_LUA)
+    await _drain_bucket(keys=[bucket.key], args=[bucket.rate, seconds, bucket.burst])
+
+
 async def rate_limit(user_id: int, key: str, limit_seconds: int) -> bool:
-    client = get_redis()
-    bucket = f"rate:{key}:{user_id}"
-    created = await client.set(bucket, "1", nx=True, ex=limit_seconds)
-    return bool(created)
+    wait = await take_tokens([Bucket(f"rl:cooldown:{key}:{user_id}", rate=1 / limit_seconds, burst=1)])
+    return wait == 0
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import os
+import time
+
+from app.common.config import settings
+
+
+class SecretFile:
+    def __init__(self, path: str, check_interval: float = 5.0) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._value: str | None = None
+        self._mtime_ns: int | None = None
+        self._checked_at = 0.0
+
+    def read(self) -> str:
+        now = time.monotonic()
+        if self._value is not None and now - self._checked_at < self.check_interval:
+            return self._value
+        self._checked_at = now
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if self._value is None or mtime_ns != self._mtime_ns:
+            self._value = settings.read_secret(self.path)
+            self._mtime_ns = mtime_ns
+        return self._value
+
+
+_secrets: dict[str, SecretFile] = {}
+
+
+def cached_secret(path: str) -> str:
+    secret = _secrets.get(path)
+    if secret is None:
+        secret = _secrets.setdefault(path, SecretFile(path))
+    return secret.read()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, TextIO
+
+from app.common.config import settings
+
+logger = logging.getLogger("tracing")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+_export_file: TextIO | None = None
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    parent_id: str | None
+    attributes: Dict[str, Any]
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    started_at: float = field(default_factory=time.time)
+    _started: float = field(default_factory=time.perf_counter)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def current_trace_id() -> str | None:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+@contextmanager
+def span(name: str, trace_id: str | None = None, **attributes: Any) -> Iterator[Span]:
+    parent = _current_span.get()
+    trace_id = trace_id or (parent.trace_id if parent else new_trace_id())
+    current = Span(
+        name=name,
+        trace_id=trace_id,
+        parent_id=parent.span_id if parent and parent.trace_id == trace_id else None,
+        attributes=attributes,
+    )
+    token = _current_span.set(current)
+    status = "ok"
+    try:
+        yield current
+    except BaseException as exc:
+        status = "error"
+        current.set(error=type(exc).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        _export(current, time.perf_counter() - current._started, status)
+
+
+def _export(current: Span, duration: float, status: str) -> None:
+    global _export_file
+    if not settings.trace_export_path:
+        return
+    record = {
+        "trace_id": current.trace_id,
+        "span_id": current.span_id,
+        "parent_id": current.parent_id,
+        "name": current.name,
+        "start": current.started_at,
+        "duration_ms": round(duration * 1000, 3),
+        "status": status,
+        "attributes": current.attributes,
+    }
+    try:
+        if _export_file is None:
+            _export_file = open(settings.trace_export_path, "a", encoding="utf-8", buffering=1)
+        _export_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    except OSError as exc:
+        logger.error("trace_export_failed", extra={"extra": {"error": str(exc)}})
+
+
+def close_tracing() -> None:
+    global _export_file
+    if _export_file is not None:
+        _export_file.close()
+        _export_file = None
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.common.logging import setup_logging
+from app.db.repos.jobs import claim_jobs, get_next_run_after
+from app.db.repos.notifications import has_notification
+from app.db.repos.payments import get_payment_by_provider_id
+from app.db.repos.subscriptions import get_active_subscription, list_user_subscriptions
+from app.db.repos.tickets import list_ticket_messages, list_tickets
+from app.db.session import engine
+
+logger = logging.getLogger("db.plan_check")
+
+USER_BASE = 900_000_000
+JOB_KEY_PREFIX = "plan_check:"
+
+CONFLICT_SQL = """
+    SELECT (SELECT count(*) FROM users WHERE tg_id > :base AND tg_id <= :base + :rows)
+         + (SELECT count(*) FROM jobs WHERE starts_with(idempotency_key, :prefix))
+"""
+
+SEED_SQL = [
+    """
+    INSERT INTO users (tg_id, username, created_at, ref_code, adguard_enabled)
+    SELECT :base + g, NULL, now(), 'pc' || g, false FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO subscriptions (user_id, plan_code, location_code, expires_at, status, provision_meta)
+    SELECT :base + g, :plan_code, :location_code,
+           now() + ((g % 60) - 30) * interval '1 day',
+           CASE WHEN g % 10 = 0 THEN 'active' ELSE 'expired' END,
+           '{}'::jsonb
+    FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO notifications_log (user_id, subscription_id, type, created_at)
+    SELECT s.user_id, s.id, 'expires_3d', now() FROM subscriptions s WHERE s.user_id > :base
+    """,
+    """
+    INSERT INTO jobs (job_type, payload, status, idempotency_key, attempts, max_attempts, run_after, created_at, updated_at)
+    SELECT 'send_notifications', '{}'::jsonb,
+           CASE WHEN g % 100 = 0 THEN 'pending' ELSE 'done' END,
+           'plan_check:' || g, 0, 5, now() - interval '1 hour', now(), now()
+    FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO tickets (user_id, status, created_at)
+    SELECT :base + g, 'open', now() FROM generate_series(1, :rows, 10) AS g
+    """,
+    """
+    INSERT INTO ticket_messages (ticket_id, sender_tg_id, body, created_at)
+    SELECT t.id, t.user_id, 'plan check', now() FROM tickets t, generate_series(1, 3) WHERE t.user_id > :base
+    """,
+    """
+    INSERT INTO payment_intents (id, user_id, plan_code, period_days, location_code, amount_stars, provider, status, created_at, expires_at, meta)
+    SELECT md5('plan_check' || g)::uuid, :base + g, :plan_code, 30, :location_code, 100, 'stars', 'paid', now(), now(), '{}'::jsonb
+    FROM generate_series(1, :rows, 10) AS g
+    """,
+    """
+    INSERT INTO payments (id, intent_id, user_id, plan_code, provider, provider_payment_id, amount_stars, currency, status, raw, created_at)
+    SELECT md5('plan_check_payment' || g)::uuid, md5('plan_check' || g)::uuid, :base + g, :plan_code, 'stars',
+           'plan_check:' || g, 100, 'XTR', 'paid', '{}'::jsonb, now()
+    FROM generate_series(1, :rows, 10) AS g
+    """,
+]
+
+ANALYZE_TABLES = ["users", "subscriptions", "notifications_log", "jobs", "tickets", "ticket_messages", "payments"]
+
+Check = tuple[str, Callable[[AsyncSession], Awaitable[Any]], set[str]]
+
+
+def build_checks(user_id: int, plan_code: str, location_code: str, ticket_id: int) -> list[Check]:
+    return [
+        (
+            "claim_jobs",
+            lambda session: claim_jobs(session, "plan_check", limit=50, key_prefix=JOB_KEY_PREFIX),
+            {"ix_jobs_pending_run_after", "ix_jobs_running_locked_until"},
+        ),
+        ("get_next_run_after", get_next_run_after, {"ix_jobs_pending_run_after"}),
+        (
+            "get_active_subscription",
+            lambda session: get_active_subscription(session, user_id, plan_code, location_code),
+            {"ix_subscriptions_user_active"},
+        ),
+        (
+            "list_user_subscriptions",
+            lambda session: list_user_subscriptions(session, user_id),
+            {"ix_subscriptions_user_id", "ix_subscriptions_user_active"},
+        ),
+        (
+            "has_notification",
+            lambda session: has_notification(session, user_id, 1, "expires_3d"),
+            {"uq_notification"},
+        ),
+        ("list_tickets", lambda session: list_tickets(session, user_id), {"ix_tickets_user_id"}),
+        (
+            "list_ticket_messages",
+            lambda session: list_ticket_messages(session, ticket_id),
+            {"ix_ticket_messages_ticket_id"},
+        ),
+        (
+            "get_payment_by_provider_id",
+            lambda session: get_payment_by_provider_id(session, "plan_check:11"),
+            {"payments_provider_payment_id_key"},
+        ),
+    ]
+
+
+def plan_indexes(node: dict) -> set[str]:
+    found = {node["Index Name"]} if "Index Name" in node else set()
+    for child in node.get("Plans", []):
+        found |= plan_indexes(child)
+    return found
+
+
+async def capture_statements(conn: AsyncConnection, call: Callable[[AsyncSession], Awaitable[Any]]) -> list[tuple[str, Any]]:
+    captured: list[tuple[str, Any]] = []
+
+    def on_execute(_conn, _cursor, statement, parameters, _context, _executemany) -> None:
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            captured.append((statement, parameters))
+
+    event.listen(conn.sync_connection, "before_cursor_execute", on_execute)
+    try:
+        session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        async with session:
+            await call(session)
+    finally:
+        event.remove(conn.sync_connection, "before_cursor_execute", on_execute)
+    return captured
+
+
+async def explain(conn: AsyncConnection, statement: str, parameters: Any) -> dict:
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def run(rows: int) -> bool:
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            row = (
+                await conn.execute(
+                    text("SELECT plan_code, location_code FROM plan_location_mapping ORDER BY id LIMIT 1")
+                )
+            ).first()
+            if row is None:
+                logger.error("plan_check_requires_seed")
+                return False
+            plan_code, location_code = row
+            params = {"base": USER_BASE, "rows": rows, "plan_code": plan_code, "location_code": location_code}
+            conflicts = (
+                await conn.execute(text(CONFLICT_SQL), {"base": USER_BASE, "rows": rows, "prefix": JOB_KEY_PREFIX})
+            ).scalar_one()
+            if conflicts:
+                logger.error(
+                    "plan_check_range_in_use",
+                    extra={"extra": {"tg_id_from": USER_BASE + 1, "tg_id_to": USER_BASE + rows, "rows": conflicts}},
+                )
+                return False
+            for sql in SEED_SQL:
+                await conn.execute(text(sql), params)
+            for table in ANALYZE_TABLES:
+                await conn.execute(text(f"ANALYZE {table}"))
+            ticket_id = (
+                await conn.execute(text("SELECT min(id) FROM tickets WHERE user_id > :base"), params)
+            ).scalar_one()
+
+            ok = True
+            for name, call, expected in build_checks(USER_BASE + 10, plan_code, location_code, ticket_id):
+                statements = await capture_statements(conn, call)
+                used: set[str] = set()
+                for statement, parameters in statements:
+                    used |= plan_indexes(await explain(conn, statement, parameters))
+                passed = bool(used & expected)
+                ok = ok and passed
+                logger.info(
+                    "plan_check",
+                    extra={"extra": {"check": name, "ok": passed, "indexes": sorted(used), "expected": sorted(expected)}},
+                )
+            return ok
+        finally:
+            await transaction.rollback()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed synthetic rows in a rolled-back transaction and EXPLAIN hot repo queries.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    setup_logging()
+    ok = await run(args.rows)
+    await engine.dispose()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Broadcast, Subscription, User
+
+SEGMENTS = ("all", "active", "inactive")
+
+
+async def create_broadcast(session: AsyncSession, created_by: int, segment: str, text: str) -> Broadcast:
+    broadcast = Broadcast(created_by=created_by, segment=segment, text=text, status="pending")
+    session.add(broadcast)
+    await session.flush()
+    return broadcast
+
+
+async def get_broadcast(session: AsyncSession, broadcast_id: int) -> Broadcast | None:
+    result = await session.execute(sa.lambda_stmt(lambda: select(Broadcast).where(Broadcast.id == broadcast_id)))
+    return result.scalar_one_or_none()
+
+
+async def get_broadcast_status(session: AsyncSession, broadcast_id: int) -> str | None:
+    result = await session.execute(select(Broadcast.status).where(Broadcast.id == broadcast_id))
+    return result.scalar_one_or_none()
+
+
+async def list_broadcasts(session: AsyncSession, limit: int = 5) -> list[Broadcast]:
+    result = await session.execute(select(Broadcast).order_by(Broadcast.id.desc()).limit(limit))
+    return list(result.scalars().all())
+
+
+async def stream_recipients(
+    session: AsyncSession,
+    segment: str,
+    after: int | None,
+    limit: int,
+    yield_per: int,
+) -> AsyncIterator[int]:
+    query = select(User.tg_id).order_by(User.tg_id).limit(limit)
+    if after is not None:
+        query = query.where(User.tg_id > after)
+    if segment in {"active", "inactive"}:
+        has_active = (
+            select(Subscription.id)
+            .where(Subscription.user_id == User.tg_id, Subscription.status == "active")
+            .exists()
+        )
+        query = query.where(has_active if segment == "active" else ~has_active)
+    result = await session.stream_scalars(query.execution_options(yield_per=yield_per))
+    async for tg_id in result:
+        yield tg_id
+
+
+async def save_broadcast_progress(
+    session: AsyncSession,
+    broadcast_id: int,
+    cursor: int | None,
+    sent: int = 0,
+    failed: int = 0,
+    blocked: int = 0,
+    status: str | None = None,
+) -> str:
+    values = {
+        "cursor": cursor,
+        "sent": Broadcast.sent + sent,
+        "failed": Broadcast.failed + failed,
+        "blocked": Broadcast.blocked + blocked,
+        "updated_at": sa.func.now(),
+    }
+    if status is not None:
+        values["status"] = sa.case((Broadcast.status == "cancelled", Broadcast.status), else_=status)
+        if status == "done":
+            values["finished_at"] = sa.func.now()
+    result = await session.execute(
+        sa.update(Broadcast).where(Broadcast.id == broadcast_id).values(**values).returning(Broadcast.status)
+    )
+    return result.scalar_one()
+
+
+async def cancel_broadcast(session: AsyncSession, broadcast_id: int) -> bool:
+    result = await session.execute(
+        sa.update(Broadcast)
+        .where(Broadcast.id == broadcast_id, Broadcast.status.in_(["pending", "running"]))
+        .values(status="cancelled", finished_at=sa.func.now(), updated_at=sa.func.now())
+        .returning(Broadcast.id)
+    )
+    return result.first() is not None
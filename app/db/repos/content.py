@@ -9,3 +9,8 @@ from app.db.models import ContentPage
 async def get_page(session: AsyncSession, key: str) -> ContentPage | None:
     result = await session.execute(select(ContentPage).where(ContentPage.key == key))
     return result.scalar_one_or_none()
+
+
+async def list_pages(session: AsyncSession) -> list[ContentPage]:
+    result = await session.execute(select(ContentPage))
+    return list(result.scalars().all())
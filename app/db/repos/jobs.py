@@ -1,74 +1,293 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
 import sqlalchemy as sa
 from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import JobOutbox
+from app.common.time import utcnow
+from app.db.models import JobArchive, JobOutbox
+
+JOBS_CHANNEL = "jobs_outbox"
+FINISHED_STATUSES = ("done", "failed")
+ARCHIVE_PARTITION_PREFIX = "jobs_archive_p"
+ARCHIVE_COLUMNS = ["id", "job_type", "payload", "status", "idempotency_key", "attempts", "last_error", "created_at", "updated_at"]
+
+
+@dataclass
+class EnqueueReport:
+    created: dict[str, int] = field(default_factory=dict)
+    duplicates: list[str] = field(default_factory=list)
+
+
+async def notify_jobs(session: AsyncSession, job_type: str) -> None:
+    await session.execute(select(sa.func.pg_notify(JOBS_CHANNEL, job_type)))
 
 
 async def enqueue_job(session: AsyncSession, job: JobOutbox) -> JobOutbox:
     session.add(job)
-    await session.commit()
-    await session.refresh(job)
+    await notify_jobs(session, job.job_type)
+    await session.flush()
     return job
 
 
+def _job_row(job: JobOutbox) -> dict:
+    now = utcnow()
+    return {
+        "job_type": job.job_type,
+        "payload": job.payload or {},
+        "status": job.status or "pending",
+        "idempotency_key": job.idempotency_key,
+        "attempts": job.attempts or 0,
+        "max_attempts": job.max_attempts or 5,
+        "run_after": job.run_after or now,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
 async def enqueue_job_safe(session: AsyncSession, job: JobOutbox) -> JobOutbox:
-    session.add(job)
-    try:
-        await session.commit()
-    except IntegrityError:
-        await session.rollback()
+    result = await session.execute(
+        pg_insert(JobOutbox)
+        .values(**_job_row(job))
+        .on_conflict_do_nothing(index_elements=[JobOutbox.idempotency_key])
+        .returning(JobOutbox)
+    )
+    created = result.scalar_one_or_none()
+    if created is None:
         result = await session.execute(select(JobOutbox).where(JobOutbox.idempotency_key == job.idempotency_key))
-        existing = result.scalar_one()
-        return existing
-    await session.refresh(job)
-    return job
+        return result.scalar_one()
+    await notify_jobs(session, created.job_type)
+    return created
 
 
-async def list_pending_jobs(session: AsyncSession, limit: int = 50) -> list[JobOutbox]:
+async def enqueue_jobs_bulk(session: AsyncSession, jobs: list[JobOutbox]) -> EnqueueReport:
+    report = EnqueueReport()
+    if not jobs:
+        return report
+    table = JobOutbox.__table__
     result = await session.execute(
-        select(JobOutbox)
-        .where(JobOutbox.status == "pending")
-        .where(JobOutbox.run_after <= sa.func.now())
+        pg_insert(table)
+        .on_conflict_do_nothing(index_elements=["idempotency_key"])
+        .returning(table.c.id, table.c.idempotency_key, table.c.job_type),
+        [_job_row(job) for job in jobs],
+    )
+    job_types: set[str] = set()
+    for row in result:
+        report.created[row.idempotency_key] = row.id
+        job_types.add(row.job_type)
+    seen: set[str] = set()
+    for job in jobs:
+        if job.idempotency_key in seen or job.idempotency_key not in report.created:
+            report.duplicates.append(job.idempotency_key)
+        seen.add(job.idempotency_key)
+    for job_type in sorted(job_types):
+        await notify_jobs(session, job_type)
+    return report
+
+
+async def claim_jobs(
+    session: AsyncSession,
+    worker_id: str,
+    limit: int = 50,
+    lease_seconds: int = 300,
+    exclude_types: list[str] | None = None,
+    key_prefix: str | None = None,
+    type_caps: dict[str, int] | None = None,
+) -> list[JobOutbox]:
+    now = sa.func.now()
+    query = select(JobOutbox.id, JobOutbox.job_type, JobOutbox.run_after).where(
+        sa.or_(
+            sa.and_(JobOutbox.status == "pending", JobOutbox.run_after <= now),
+            sa.and_(JobOutbox.status == "running", JobOutbox.locked_until < now),
+        )
+    )
+    if exclude_types:
+        query = query.where(JobOutbox.job_type.not_in(exclude_types))
+    if key_prefix:
+        query = query.where(JobOutbox.idempotency_key.startswith(key_prefix, autoescape=True))
+    claimable = (
+        query.order_by(JobOutbox.run_after)
         .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("claimable")
     )
-    return list(result.scalars().all())
+    if type_caps:
+        locked = claimable
+        rank = sa.func.row_number().over(partition_by=locked.c.job_type, order_by=locked.c.run_after)
+        ranked = select(locked.c.id, locked.c.job_type, rank.label("rank")).cte("ranked")
+        cap = sa.case(type_caps, value=ranked.c.job_type, else_=None)
+        claimable = select(ranked.c.id).where(sa.or_(cap.is_(None), ranked.c.rank <= cap)).cte("capped")
+    result = await session.execute(
+        sa.update(JobOutbox)
+        .where(JobOutbox.id == claimable.c.id)
+        .values(
+            status="running",
+            attempts=sa.case((JobOutbox.status == "running", JobOutbox.attempts + 1), else_=JobOutbox.attempts),
+            locked_by=worker_id,
+            locked_until=now + sa.text(f"interval '{lease_seconds} seconds'"),
+            updated_at=now,
+        )
+        .returning(JobOutbox)
+        .execution_options(synchronize_session=False)
+    )
+    return sorted(result.scalars().all(), key=lambda job: job.run_after)
 
 
-async def mark_job_running(session: AsyncSession, job: JobOutbox) -> JobOutbox:
-    job.status = "running"
-    session.add(job)
-    await session.commit()
-    await session.refresh(job)
-    return job
+async def get_next_run_after(session: AsyncSession, exclude_types: list[str] | None = None) -> datetime | None:
+    if not exclude_types:
+        result = await session.execute(
+            sa.lambda_stmt(lambda: select(sa.func.min(JobOutbox.run_after)).where(JobOutbox.status == "pending"))
+        )
+        return result.scalar_one_or_none()
+    result = await session.execute(
+        select(sa.func.min(JobOutbox.run_after)).where(
+            JobOutbox.status == "pending",
+            JobOutbox.job_type.not_in(exclude_types),
+        )
+    )
+    return result.scalar_one_or_none()
 
 
-async def mark_job_done(session: AsyncSession, job: JobOutbox) -> JobOutbox:
-    job.status = "done"
-    session.add(job)
-    await session.commit()
-    await session.refresh(job)
-    return job
+async def count_active_jobs(session: AsyncSession) -> list[tuple[str, str, int]]:
+    result = await session.execute(
+        select(JobOutbox.status, JobOutbox.job_type, sa.func.count())
+        .where(JobOutbox.status.in_(["pending", "running"]))
+        .group_by(JobOutbox.status, JobOutbox.job_type)
+    )
+    return [(row[0], row[1], row[2]) for row in result]
 
 
-async def mark_job_failed(session: AsyncSession, job: JobOutbox, error: str) -> JobOutbox:
-    job.status = "failed"
-    job.last_error = error[:2000]
-    session.add(job)
-    await session.commit()
-    await session.refresh(job)
-    return job
+async def extend_job_leases(session: AsyncSession, worker_id: str, job_ids: list[int], lease_seconds: int = 300) -> int:
+    if not job_ids:
+        return 0
+    result = await session.execute(
+        sa.update(JobOutbox)
+        .where(
+            JobOutbox.id.in_(job_ids),
+            JobOutbox.locked_by == worker_id,
+            JobOutbox.status == "running",
+        )
+        .values(locked_until=sa.func.now() + sa.text(f"interval '{lease_seconds} seconds'"))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
 
 
-async def reschedule_job(session: AsyncSession, job: JobOutbox, delay_seconds: int, error: str) -> JobOutbox:
-    job.attempts += 1
-    job.last_error = error[:2000]
-    job.status = "pending"
-    job.run_after = sa.func.now() + sa.text(f"interval '{delay_seconds} seconds'")
-    session.add(job)
-    await session.commit()
-    await session.refresh(job)
-    return job
+async def _update_job(session: AsyncSession, job: JobOutbox, worker_id: str, **values) -> bool:
+    result = await session.execute(
+        sa.update(JobOutbox)
+        .where(JobOutbox.id == job.id, JobOutbox.locked_by == worker_id)
+        .values(locked_by=None, locked_until=None, updated_at=sa.func.now(), **values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+async def mark_job_done(session: AsyncSession, job: JobOutbox, worker_id: str) -> bool:
+    return await _update_job(session, job, worker_id, status="done")
+
+
+async def mark_job_failed(session: AsyncSession, job: JobOutbox, worker_id: str, error: str) -> bool:
+    return await _update_job(session, job, worker_id, status="failed", last_error=error[:2000])
+
+
+async def reschedule_job(session: AsyncSession, job: JobOutbox, worker_id: str, delay_seconds: int, error: str) -> bool:
+    return await _update_job(
+        session,
+        job,
+        worker_id,
+        status="pending",
+        attempts=JobOutbox.attempts + 1,
+        last_error=error[:2000],
+        run_after=sa.func.now() + sa.text(f"interval '{delay_seconds} seconds'"),
+    )
+
+
+async def defer_job(session: AsyncSession, job: JobOutbox, worker_id: str, delay_seconds: int, reason: str) -> bool:
+    return await _update_job(
+        session,
+        job,
+        worker_id,
+        status="pending",
+        last_error=reason[:2000],
+        run_after=sa.func.now() + sa.text(f"interval '{delay_seconds} seconds'"),
+    )
+
+
+def _month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+async def get_oldest_finished_job(session: AsyncSession, before: datetime) -> datetime | None:
+    result = await session.execute(
+        select(sa.func.min(JobOutbox.updated_at)).where(
+            JobOutbox.status.in_(FINISHED_STATUSES),
+            JobOutbox.updated_at < before,
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def ensure_archive_partitions(session: AsyncSession, start: datetime, end: datetime) -> None:
+    month = _month_start(start)
+    while month <= end:
+        upper = _next_month(month)
+        await session.execute(
+            sa.text(
+                f"CREATE TABLE IF NOT EXISTS {ARCHIVE_PARTITION_PREFIX}{month:%Y%m} PARTITION OF jobs_archive "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+        )
+        month = upper
+
+
+async def archive_finished_jobs(session: AsyncSession, before: datetime, limit: int) -> int:
+    table = JobOutbox.__table__
+    candidates = (
+        select(table.c.id)
+        .where(table.c.status.in_(FINISHED_STATUSES), table.c.updated_at < before)
+        .order_by(table.c.updated_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        sa.delete(table)
+        .where(table.c.id.in_(candidates.scalar_subquery()))
+        .returning(*[table.c[name] for name in ARCHIVE_COLUMNS])
+        .cte("moved")
+    )
+    result = await session.execute(
+        sa.insert(JobArchive.__table__).from_select(
+            ARCHIVE_COLUMNS + ["archived_at"],
+            select(*[moved.c[name] for name in ARCHIVE_COLUMNS], sa.func.now()),
+        )
+    )
+    return result.rowcount
+
+
+async def drop_archive_partitions(session: AsyncSession, before: datetime) -> list[str]:
+    result = await session.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'jobs_archive'::regclass"
+        )
+    )
+    dropped: list[str] = []
+    for name in sorted(result.scalars()):
+        try:
+            month = datetime.strptime(name.removeprefix(ARCHIVE_PARTITION_PREFIX), "%Y%m").replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        if _next_month(month) <= before:
+            await session.execute(sa.text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return dropped
@@ -20,3 +20,8 @@ async def get_mapping(session: AsyncSession, plan_code: str, location_code: str)
         )
     )
     return result.scalar_one_or_none()
+
+
+async def list_active_mappings(session: AsyncSession) -> list[PlanLocationMapping]:
+    result = await session.execute(select(PlanLocationMapping).where(PlanLocationMapping.is_active.is_(True)))
+    return list(result.scalars().all())
@@ -1,25 +1,63 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from datetime import timedelta
+
+import sqlalchemy as sa
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import NotificationLog
+from app.db.models import NotificationLog, Subscription
 
 
 async def add_notification(session: AsyncSession, user_id: int, subscription_id: int, type_: str) -> NotificationLog:
     log = NotificationLog(user_id=user_id, subscription_id=subscription_id, type=type_)
     session.add(log)
-    await session.commit()
-    await session.refresh(log)
+    await session.flush()
     return log
 
 
 async def has_notification(session: AsyncSession, user_id: int, subscription_id: int, type_: str) -> bool:
     result = await session.execute(
-        select(NotificationLog).where(
-            NotificationLog.user_id == user_id,
-            NotificationLog.subscription_id == subscription_id,
-            NotificationLog.type == type_,
+        lambda_stmt(
+            lambda: select(NotificationLog.id).where(
+                NotificationLog.user_id == user_id,
+                NotificationLog.subscription_id == subscription_id,
+                NotificationLog.type == type_,
+            )
         )
     )
     return result.scalar_one_or_none() is not None
+
+
+async def list_notice_candidates(
+    session: AsyncSession,
+    windows: dict[str, timedelta],
+    after: tuple[int, str] | None = None,
+    limit: int = 1000,
+) -> list[tuple[int, int, str]]:
+    notice = sa.values(
+        sa.column("type", sa.String),
+        sa.column("horizon", sa.Interval),
+        name="notice",
+    ).data(list(windows.items()))
+    now = sa.func.now()
+    query = (
+        select(Subscription.id, Subscription.user_id, notice.c.type)
+        .select_from(Subscription)
+        .join(notice, Subscription.expires_at < now + notice.c.horizon)
+        .where(
+            Subscription.status == "active",
+            Subscription.expires_at < now + max(windows.values()),
+            ~sa.exists().where(
+                NotificationLog.user_id == Subscription.user_id,
+                NotificationLog.subscription_id == Subscription.id,
+                NotificationLog.type == notice.c.type,
+            ),
+        )
+        .order_by(Subscription.id, notice.c.type)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(sa.tuple_(Subscription.id, notice.c.type) > sa.tuple_(*after))
+    result = await session.execute(query)
+    return [(row.id, row.user_id, row.type) for row in result]
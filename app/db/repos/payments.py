@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import uuid
-from sqlalchemy import select
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Payment, PaymentIntent
 
 
 async def get_intent(session: AsyncSession, intent_id: uuid.UUID) -> PaymentIntent | None:
-    result = await session.execute(select(PaymentIntent).where(PaymentIntent.id == intent_id))
+    result = await session.execute(lambda_stmt(lambda: select(PaymentIntent).where(PaymentIntent.id == intent_id)))
     return result.scalar_one_or_none()
 
 
@@ -18,26 +19,38 @@ async def get_intent_by_id(session: AsyncSession, intent_id: uuid.UUID) -> Payme
 
 async def create_intent(session: AsyncSession, intent: PaymentIntent) -> PaymentIntent:
     session.add(intent)
-    await session.commit()
-    await session.refresh(intent)
+    await session.flush()
     return intent
 
 
 async def update_intent_status(session: AsyncSession, intent: PaymentIntent, status: str) -> PaymentIntent:
     intent.status = status
     session.add(intent)
-    await session.commit()
-    await session.refresh(intent)
     return intent
 
 
-async def create_payment(session: AsyncSession, payment: Payment) -> Payment:
-    session.add(payment)
-    await session.commit()
-    await session.refresh(payment)
-    return payment
+async def insert_payment(session: AsyncSession, payment: Payment) -> Payment | None:
+    result = await session.execute(
+        pg_insert(Payment)
+        .values(
+            intent_id=payment.intent_id,
+            user_id=payment.user_id,
+            plan_code=payment.plan_code,
+            provider=payment.provider,
+            provider_payment_id=payment.provider_payment_id,
+            amount_stars=payment.amount_stars,
+            currency=payment.currency,
+            status=payment.status,
+            raw=payment.raw or {},
+        )
+        .on_conflict_do_nothing(index_elements=[Payment.provider_payment_id])
+        .returning(Payment)
+    )
+    return result.scalar_one_or_none()
 
 
 async def get_payment_by_provider_id(session: AsyncSession, provider_payment_id: str) -> Payment | None:
-    result = await session.execute(select(Payment).where(Payment.provider_payment_id == provider_payment_id))
+    result = await session.execute(
+        lambda_stmt(lambda: select(Payment).where(Payment.provider_payment_id == provider_payment_id))
+    )
     return result.scalar_one_or_none()
@@ -14,3 +14,8 @@ async def list_active_plans(session: AsyncSession) -> list[Plan]:
 async def get_plan(session: AsyncSession, plan_code: str) -> Plan | None:
     result = await session.execute(select(Plan).where(Plan.plan_code == plan_code))
     return result.scalar_one_or_none()
+
+
+async def list_plans(session: AsyncSession) -> list[Plan]:
+    result = await session.execute(select(Plan))
+    return list(result.scalars().all())
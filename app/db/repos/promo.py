@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import PromoCode, PromoRedemption
@@ -16,12 +17,14 @@ async def count_redemptions(session: AsyncSession, promo_id: int) -> int:
     return int(result.scalar_one())
 
 
-async def create_redemption(session: AsyncSession, promo_id: int, user_id: int) -> PromoRedemption:
-    redemption = PromoRedemption(promo_code_id=promo_id, user_id=user_id)
-    session.add(redemption)
-    await session.commit()
-    await session.refresh(redemption)
-    return redemption
+async def create_redemption(session: AsyncSession, promo_id: int, user_id: int) -> bool:
+    result = await session.execute(
+        pg_insert(PromoRedemption)
+        .values(promo_code_id=promo_id, user_id=user_id)
+        .on_conflict_do_nothing(constraint="uq_promo_user")
+        .returning(PromoRedemption.id)
+    )
+    return result.first() is not None
 
 
 async def has_redemption(session: AsyncSession, promo_id: int, user_id: int) -> bool:
@@ -1,23 +1,30 @@
 from __future__ import annotations
 
 import uuid
+import sqlalchemy as sa
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import ReferralEarning
+from app.common.time import utcnow
+from app.db.models import ReferralEarning, User
 
 
-async def create_referral(session: AsyncSession, referrer_id: int, referred_id: int, payment_id: uuid.UUID, amount_stars: int) -> ReferralEarning:
-    referral = ReferralEarning(
-        referrer_id=referrer_id,
-        referred_id=referred_id,
-        payment_id=payment_id,
-        amount_stars=amount_stars,
+async def credit_referral(session: AsyncSession, referred_id: int, payment_id: uuid.UUID, amount_stars: int) -> bool:
+    referrer = select(
+        User.referrer_id,
+        User.tg_id,
+        sa.literal(payment_id, sa.Uuid),
+        sa.literal(amount_stars),
+        sa.literal(utcnow(), sa.DateTime(timezone=True)),
+    ).where(User.tg_id == referred_id, User.referrer_id.is_not(None))
+    result = await session.execute(
+        pg_insert(ReferralEarning)
+        .from_select(["referrer_id", "referred_id", "payment_id", "amount_stars", "created_at"], referrer)
+        .on_conflict_do_nothing(constraint="uq_referral_payment")
+        .returning(ReferralEarning.id)
     )
-    session.add(referral)
-    await session.commit()
-    await session.refresh(referral)
-    return referral
+    return result.first() is not None
 
 
 async def get_referral_by_payment(session: AsyncSession, payment_id: uuid.UUID) -> ReferralEarning | None:
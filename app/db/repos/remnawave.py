@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.time import utcnow
+from app.db.models import RemnawaveServerMirror, RemnawaveUserMirror, SyncState
+from app.integrations.remnawave.schemas import RemnawaveServer, RemnawaveUser
+
+
+async def upsert_remnawave_users(session: AsyncSession, users: Iterable[RemnawaveUser]) -> int:
+    now = utcnow()
+    rows = {
+        user.id: {
+            "id": user.id,
+            "username": user.username,
+            "expires_at": user.expires_at,
+            "remote_updated_at": user.updated_at,
+            "synced_at": now,
+        }
+        for user in users
+    }
+    if not rows:
+        return 0
+    stmt = pg_insert(RemnawaveUserMirror.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "username": stmt.excluded.username,
+            "expires_at": stmt.excluded.expires_at,
+            "remote_updated_at": stmt.excluded.remote_updated_at,
+            "synced_at": stmt.excluded.synced_at,
+        },
+    )
+    await session.execute(stmt, list(rows.values()))
+    return len(rows)
+
+
+async def upsert_remnawave_servers(session: AsyncSession, servers: Iterable[RemnawaveServer]) -> int:
+    now = utcnow()
+    rows = {
+        server.id: {"id": server.id, "name": server.name, "remote_updated_at": server.updated_at, "synced_at": now}
+        for server in servers
+    }
+    if not rows:
+        return 0
+    stmt = pg_insert(RemnawaveServerMirror.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "name": stmt.excluded.name,
+            "remote_updated_at": stmt.excluded.remote_updated_at,
+            "synced_at": stmt.excluded.synced_at,
+        },
+    )
+    await session.execute(stmt, list(rows.values()))
+    return len(rows)
+
+
+async def get_sync_state(session: AsyncSession, name: str) -> SyncState | None:
+    result = await session.execute(select(SyncState).where(SyncState.name == name))
+    return result.scalar_one_or_none()
+
+
+async def save_sync_state(session: AsyncSession, name: str, high_water_mark: datetime | None, count: int) -> None:
+    stmt = pg_insert(SyncState.__table__).values(
+        name=name, high_water_mark=high_water_mark, last_count=count, last_run_at=utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={
+            "high_water_mark": stmt.excluded.high_water_mark,
+            "last_count": stmt.excluded.last_count,
+            "last_run_at": stmt.excluded.last_run_at,
+        },
+    )
+    await session.execute(stmt)
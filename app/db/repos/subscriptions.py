@@ -2,26 +2,22 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import select
+import sqlalchemy as sa
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Subscription
 
 
 async def list_user_subscriptions(session: AsyncSession, user_id: int) -> list[Subscription]:
-    result = await session.execute(select(Subscription).where(Subscription.user_id == user_id))
-    return list(result.scalars().all())
-
-
-async def list_all_subscriptions(session: AsyncSession) -> list[Subscription]:
-    result = await session.execute(select(Subscription))
+    result = await session.execute(lambda_stmt(lambda: select(Subscription).where(Subscription.user_id == user_id)))
     return list(result.scalars().all())
 
 
 async def get_subscription(session: AsyncSession, sub_id: int, user_id: int | None) -> Subscription | None:
-    query = select(Subscription).where(Subscription.id == sub_id)
+    query = lambda_stmt(lambda: select(Subscription).where(Subscription.id == sub_id))
     if user_id is not None:
-        query = query.where(Subscription.user_id == user_id)
+        query += lambda s: s.where(Subscription.user_id == user_id)
     result = await session.execute(query)
     return result.scalar_one_or_none()
 
@@ -33,20 +29,39 @@ async def get_active_subscription(
     location_code: str,
 ) -> Subscription | None:
     result = await session.execute(
-        select(Subscription).where(
-            Subscription.user_id == user_id,
-            Subscription.plan_code == plan_code,
-            Subscription.location_code == location_code,
-            Subscription.status == "active",
+        lambda_stmt(
+            lambda: select(Subscription).where(
+                Subscription.user_id == user_id,
+                Subscription.plan_code == plan_code,
+                Subscription.location_code == location_code,
+                Subscription.status == "active",
+            )
         )
     )
     return result.scalar_one_or_none()
 
 
+async def expire_due_subscriptions(session: AsyncSession, limit: int = 1000) -> list[tuple[int, int]]:
+    due = (
+        select(Subscription.id)
+        .where(Subscription.status == "active", Subscription.expires_at <= sa.func.now())
+        .order_by(Subscription.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("due")
+    )
+    result = await session.execute(
+        sa.update(Subscription)
+        .where(Subscription.id == due.c.id)
+        .values(status="expired")
+        .returning(Subscription.id, Subscription.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    return [(row.id, row.user_id) for row in result]
+
+
 async def update_subscription(session: AsyncSession, subscription: Subscription) -> Subscription:
     session.add(subscription)
-    await session.commit()
-    await session.refresh(subscription)
     return subscription
 
 
@@ -68,6 +83,5 @@ async def create_subscription(
         provision_meta=provision_meta,
     )
     session.add(sub)
-    await session.commit()
-    await session.refresh(sub)
+    await session.flush()
     return sub
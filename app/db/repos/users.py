@@ -1,20 +1,46 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import func, lambda_stmt, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.common.crypto import make_ref_code
 from app.common.time import utcnow
-from app.db.models import User
+from app.db.models import Subscription, Ticket, User
+
+
+@dataclass
+class UserSnapshot:
+    user: User | None
+    subscriptions: list[Subscription] = field(default_factory=list)
+    tickets: list[Ticket] = field(default_factory=list)
+
+    @property
+    def trial_available(self) -> bool:
+        return self.user is not None and self.user.trial_used_at is None
+
+    @property
+    def active_subscriptions(self) -> list[Subscription]:
+        return [sub for sub in self.subscriptions if sub.status == "active"]
+
+    @property
+    def open_tickets(self) -> list[Ticket]:
+        return [ticket for ticket in self.tickets if ticket.status != "closed"]
+
+    def subscription(self, sub_id: int) -> Subscription | None:
+        return next((sub for sub in self.subscriptions if sub.id == sub_id), None)
 
 
 async def get_user(session: AsyncSession, tg_id: int) -> User | None:
-    result = await session.execute(select(User).where(User.tg_id == tg_id))
+    result = await session.execute(lambda_stmt(lambda: select(User).where(User.tg_id == tg_id)))
     return result.scalar_one_or_none()
 
 
 async def get_user_by_ref_code(session: AsyncSession, ref_code: str) -> User | None:
-    result = await session.execute(select(User).where(User.ref_code == ref_code))
+    result = await session.execute(lambda_stmt(lambda: select(User).where(User.ref_code == ref_code)))
     return result.scalar_one_or_none()
 
 
@@ -26,8 +52,7 @@ async def create_user(
 ) -> User:
     user = User(tg_id=tg_id, username=username, referrer_id=referrer_id, ref_code=make_ref_code())
     session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    await session.flush()
     return user
 
 
@@ -37,8 +62,6 @@ async def mark_trial_used(session: AsyncSession, tg_id: int, at_time=None) -> Us
         return None
     user.trial_used_at = at_time or utcnow()
     session.add(user)
-    await session.commit()
-    await session.refresh(user)
     return user
 
 
@@ -48,6 +71,45 @@ async def set_adguard(session: AsyncSession, tg_id: int, enabled: bool) -> User
         return None
     user.adguard_enabled = enabled
     session.add(user)
-    await session.commit()
-    await session.refresh(user)
     return user
+
+
+def _json_rows(columns: list, where, order_by):
+    row = func.json_build_object(*[part for column in columns for part in (column.key, column)])
+    return (
+        select(func.coalesce(func.json_agg(aggregate_order_by(row, order_by)), func.json_build_array()))
+        .where(where)
+        .scalar_subquery()
+    )
+
+
+async def load_user_snapshot(session: AsyncSession, tg_id: int) -> UserSnapshot:
+    subscriptions = _json_rows(
+        [
+            Subscription.id,
+            Subscription.plan_code,
+            Subscription.location_code,
+            Subscription.expires_at,
+            Subscription.status,
+            Subscription.provision_meta,
+        ],
+        Subscription.user_id == tg_id,
+        Subscription.id,
+    )
+    tickets = _json_rows([Ticket.id, Ticket.status, Ticket.created_at], Ticket.user_id == tg_id, Ticket.id)
+    result = await session.execute(select(User, subscriptions, tickets).where(User.tg_id == tg_id))
+    row = result.first()
+    if row is None:
+        return UserSnapshot(user=None)
+    user, sub_rows, ticket_rows = row
+    return UserSnapshot(
+        user=user,
+        subscriptions=[
+            Subscription(user_id=tg_id, **{**item, "expires_at": datetime.fromisoformat(item["expires_at"])})
+            for item in sub_rows
+        ],
+        tickets=[
+            Ticket(user_id=tg_id, **{**item, "created_at": datetime.fromisoformat(item["created_at"])})
+            for item in ticket_rows
+        ],
+    )
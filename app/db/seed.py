@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 from sqlalchemy import delete
 
+from app.catalog.cache import publish_catalog_invalidation
 from app.common.config import settings
 from app.common.time import utcnow
 from app.db.session import SessionLocal
@@ -108,6 +109,7 @@ async def seed() -> None:
         pages = [ContentPage(key=key, title=title, body_md=body, updated_at=utcnow()) for key, title, body in CONTENT_PAGES]
         session.add_all(pages)
         await session.commit()
+    await publish_catalog_invalidation()
 
 
 if __name__ == "__main__":
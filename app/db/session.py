@@ -1,11 +1,42 @@
 from __future__ import annotations
 
+import time
+
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.common.config import settings
+from app.common.metrics import DB_POOL_ACQUIRE, instrument_engine
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_ACQUIRE.observe(time.perf_counter() - started)
+
+
+def build_engine(service: str | None = None) -> AsyncEngine:
+    profile = settings.db_engine_profile(service)
+    built = create_async_engine(
+        settings.database_url,
+        poolclass=TimedQueuePool,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        pool_timeout=profile["pool_timeout"],
+        pool_recycle=profile["pool_recycle"],
+        pool_pre_ping=profile["pool_pre_ping"],
+        connect_args={"prepared_statement_cache_size": profile["statement_cache_size"]},
+    )
+    instrument_engine(built)
+    return built
 
 
-engine: AsyncEngine = create_async_engine(settings.database_url, pool_pre_ping=True)
+engine: AsyncEngine = build_engine()
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.logging import setup_logging
+from app.db.models import NotificationLog, Payment, PaymentIntent, Subscription, User
+from app.db.repos.notifications import has_notification
+from app.db.repos.payments import get_intent, get_payment_by_provider_id
+from app.db.repos.subscriptions import get_active_subscription, get_subscription, list_user_subscriptions
+from app.db.repos.users import get_user
+from app.db.session import SessionLocal, engine
+
+logger = logging.getLogger("db.statement_bench")
+
+Call = Callable[[AsyncSession], Awaitable[Any]]
+INTENT_ID = uuid.UUID(int=1)
+
+
+def build_cases() -> list[tuple[str, Call, Call]]:
+    return [
+        (
+            "get_user",
+            lambda session: session.execute(select(User).where(User.tg_id == 1)),
+            lambda session: get_user(session, 1),
+        ),
+        (
+            "get_subscription",
+            lambda session: session.execute(
+                select(Subscription).where(Subscription.id == 1).where(Subscription.user_id == 1)
+            ),
+            lambda session: get_subscription(session, 1, 1),
+        ),
+        (
+            "get_active_subscription",
+            lambda session: session.execute(
+                select(Subscription).where(
+                    Subscription.user_id == 1,
+                    Subscription.plan_code == "classic",
+                    Subscription.location_code == "nl1",
+                    Subscription.status == "active",
+                )
+            ),
+            lambda session: get_active_subscription(session, 1, "classic", "nl1"),
+        ),
+        (
+            "list_user_subscriptions",
+            lambda session: session.execute(select(Subscription).where(Subscription.user_id == 1)),
+            lambda session: list_user_subscriptions(session, 1),
+        ),
+        (
+            "has_notification",
+            lambda session: session.execute(
+                select(NotificationLog.id).where(
+                    NotificationLog.user_id == 1,
+                    NotificationLog.subscription_id == 1,
+                    NotificationLog.type == "expires_3d",
+                )
+            ),
+            lambda session: has_notification(session, 1, 1, "expires_3d"),
+        ),
+        (
+            "get_intent",
+            lambda session: session.execute(select(PaymentIntent).where(PaymentIntent.id == INTENT_ID)),
+            lambda session: get_intent(session, INTENT_ID),
+        ),
+        (
+            "get_payment_by_provider_id",
+            lambda session: session.execute(select(Payment).where(Payment.provider_payment_id == "bench")),
+            lambda session: get_payment_by_provider_id(session, "bench"),
+        ),
+    ]
+
+
+async def measure(session: AsyncSession, call: Call, iterations: int) -> tuple[float, float]:
+    sent: list[float] = []
+
+    def on_execute(*_args) -> None:
+        sent.append(time.perf_counter())
+
+    conn = await session.connection()
+    event.listen(conn.sync_connection, "before_cursor_execute", on_execute)
+    overhead: list[float] = []
+    total: list[float] = []
+    try:
+        for _ in range(iterations):
+            sent.clear()
+            started = time.perf_counter()
+            await call(session)
+            finished = time.perf_counter()
+            overhead.append(sent[0] - started)
+            total.append(finished - started)
+    finally:
+        event.remove(conn.sync_connection, "before_cursor_execute", on_execute)
+    return statistics.median(overhead) * 1e6, statistics.median(total) * 1e6
+
+
+async def run(iterations: int) -> list[dict]:
+    results = []
+    async with SessionLocal() as session:
+        for name, inline, cached in build_cases():
+            await measure(session, inline, 50)
+            await measure(session, cached, 50)
+            inline_overhead, inline_total = await measure(session, inline, iterations)
+            cached_overhead, cached_total = await measure(session, cached, iterations)
+            result = {
+                "query": name,
+                "inline_overhead_us": round(inline_overhead, 1),
+                "cached_overhead_us": round(cached_overhead, 1),
+                "inline_total_us": round(inline_total, 1),
+                "cached_total_us": round(cached_total, 1),
+            }
+            results.append(result)
+            logger.info("statement_bench", extra={"extra": result})
+        await session.rollback()
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare per-call SQLAlchemy overhead of inline select() against the cached repo statements."
+    )
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    setup_logging()
+    await run(args.iterations)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
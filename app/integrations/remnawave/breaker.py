@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import random
+import time
+
+from app.common.config import settings
+from app.common.errors import RemnawaveUnavailableError
+from app.integrations.remnawave.endpoint_map import DEFAULT_ENDPOINTS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: float | None = None
+
+    def before_request(self) -> None:
+        now = time.monotonic()
+        if self.state == OPEN:
+            remaining = self._opened_at + self.reset_seconds - now
+            if remaining > 0:
+                raise RemnawaveUnavailableError(f"remnawave_circuit_open:{self.name}", remaining)
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probe_started_at is not None and now - self._probe_started_at < self.reset_seconds:
+                raise RemnawaveUnavailableError(f"remnawave_circuit_probing:{self.name}", self.reset_seconds)
+            self._probe_started_at = now
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        self._probe_started_at = None
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+
+class RetryBudget:
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float = 20.0) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._updated_at) * self.min_per_second)
+        self._updated_at = now
+
+    def deposit(self) -> None:
+        self._refill()
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def backoff_delay(attempt: int) -> float:
+    ceiling = min(settings.remnawave_backoff_max_seconds, settings.remnawave_backoff_base_seconds * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+retry_budget = RetryBudget(settings.remnawave_retry_budget_ratio, settings.remnawave_retry_budget_min_per_second)
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers.setdefault(
+            name,
+            CircuitBreaker(name, settings.remnawave_breaker_failure_threshold, settings.remnawave_breaker_reset_seconds),
+        )
+    return breaker
+
+
+for _name in DEFAULT_ENDPOINTS:
+    get_breaker(_name)
@@ -4,15 +4,21 @@ import asyncio
 import logging
 
 from app.common.logging import setup_logging
-from app.integrations.remnawave.service import RemnawaveService
+from app.integrations.remnawave.client import close_http_client
+from app.integrations.remnawave.service import get_remnawave_service
 
 
 async def main() -> None:
     setup_logging()
     logger = logging.getLogger("remnawave.check")
-    service = RemnawaveService()
-    servers = await service.sync_servers()
-    logger.info("remnawave_check", extra={"extra": {"servers": len(servers)}})
+    service = get_remnawave_service()
+    servers = 0
+    try:
+        async for page in service.iter_servers():
+            servers += len(page)
+    finally:
+        await close_http_client()
+    logger.info("remnawave_check", extra={"extra": {"servers": servers}})
 
 
 if __name__ == "__main__":
@@ -1,30 +1,105 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from typing import Any, Dict
 
 import httpx
 
 from app.common.config import settings
+from app.common.metrics import REMNAWAVE_LATENCY
+from app.common.secret_files import cached_secret
+from app.common.tracing import span
+from app.integrations.remnawave.breaker import backoff_delay, get_breaker, retry_budget
+
+_http: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(
+            http2=settings.remnawave_http2,
+            timeout=settings.remnawave_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.remnawave_max_connections,
+                max_keepalive_connections=settings.remnawave_max_keepalive_connections,
+                keepalive_expiry=settings.remnawave_keepalive_expiry_seconds,
+            ),
+        )
+    return _http
+
+
+async def close_http_client() -> None:
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
 
 
 class RemnawaveClient:
     def __init__(self) -> None:
         self.base_url = settings.remnawave_base_url.rstrip("/")
-        self.token = settings.read_secret(settings.remnawave_token_file)
+        self.timeouts = settings.remnawave_endpoint_timeouts()
 
     def _headers(self) -> Dict[str, str]:
-        return {"Authorization": f"Bearer {self.token}"}
+        return {"Authorization": f"Bearer {cached_secret(settings.remnawave_token_file)}"}
 
-    async def request(self, method: str, path: str, json: dict | None = None) -> Any:
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        json: dict | None,
+        params: dict | None,
+        timeout: float,
+        endpoint: str,
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await client.request(method, url, headers=self._headers(), json=json, params=params, timeout=timeout)
+            status = str(response.status_code)
+            return response
+        finally:
+            REMNAWAVE_LATENCY.labels(endpoint=endpoint, status=status).observe(time.perf_counter() - started)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        json: dict | None = None,
+        endpoint: str | None = None,
+        params: dict | None = None,
+    ) -> Any:
         url = f"{self.base_url}{path}"
-        async with httpx.AsyncClient(timeout=10) as client:
-            for attempt in range(3):
+        timeout = self.timeouts.get(endpoint or "", settings.remnawave_timeout_seconds)
+        breaker = get_breaker(endpoint or path)
+        client = get_http_client()
+        retry_budget.deposit()
+        attempts = max(1, settings.remnawave_max_attempts)
+        with span("remnawave.request", endpoint=endpoint or path, method=method) as current:
+            for attempt in range(attempts):
+                current.set(attempts=attempt + 1)
+                breaker.before_request()
                 try:
-                    response = await client.request(method, url, headers=self._headers(), json=json)
+                    response = await self._send(client, method, url, json, params, timeout, endpoint or "unknown")
+                    current.set(status=response.status_code)
                     response.raise_for_status()
-                    return response.json()
-                except httpx.HTTPError:
-                    if attempt == 2:
+                except httpx.HTTPError as exc:
+                    if not _is_upstream_failure(exc):
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    if attempt == attempts - 1 or not retry_budget.try_withdraw():
                         raise
-                    await asyncio.sleep(1 + attempt)
+                    await asyncio.sleep(backoff_delay(attempt))
+                    continue
+                breaker.record_success()
+                return response.json()
+
+
+def _is_upstream_failure(exc: httpx.HTTPError) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, httpx.TransportError)
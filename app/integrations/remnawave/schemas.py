@@ -1,14 +1,26 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from datetime import datetime, timezone
+from typing import Annotated
+
+from pydantic import AfterValidator, BaseModel
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+UtcDatetime = Annotated[datetime, AfterValidator(_as_utc)]
 
 
 class RemnawaveUser(BaseModel):
     id: str
     username: str
-    expires_at: str | None = None
+    expires_at: UtcDatetime | None = None
+    updated_at: UtcDatetime | None = None
 
 
 class RemnawaveServer(BaseModel):
     id: str
     name: str
+    updated_at: UtcDatetime | None = None
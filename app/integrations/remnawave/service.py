@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import logging
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
 
-from app.common.config import settings
+from app.common.config import Settings, settings
 from app.common.errors import RemnawaveEndpointError
 from app.integrations.remnawave.client import RemnawaveClient
 from app.integrations.remnawave.endpoint_map import build_endpoint_map, validate_endpoints
 from app.integrations.remnawave.mapping import map_server, map_user
+from app.integrations.remnawave.schemas import RemnawaveServer, RemnawaveUser
+
+logger = logging.getLogger("remnawave.service")
 
 
 class RemnawaveService:
@@ -23,7 +27,7 @@ class RemnawaveService:
 
     async def ensure_user(self, username: str) -> dict:
         path = self._path("create_user")
-        return await self.client.request("POST", path, json={"username": username})
+        return await self.client.request("POST", path, json={"username": username}, endpoint="create_user")
 
     async def apply_access(self, user_id: str, profile_uuid: str, expires_at: datetime) -> dict:
         path = self._path("update_user", user_id=user_id)
@@ -31,22 +35,75 @@ class RemnawaveService:
             "PATCH",
             path,
             json={"profile_uuid": profile_uuid, "expires_at": expires_at.isoformat()},
+            endpoint="update_user",
         )
 
     async def extend_expiration(self, user_id: str, days: int) -> dict:
         path = self._path("extend_expiration", user_id=user_id)
-        return await self.client.request("POST", path, json={"days": days})
+        return await self.client.request("POST", path, json={"days": days}, endpoint="extend_expiration")
 
     async def get_delivery_link(self, user_id: str) -> dict:
         path = self._path("get_delivery_link", user_id=user_id)
-        return await self.client.request("GET", path)
+        return await self.client.request("GET", path, endpoint="get_delivery_link")
+
+    async def _pages(self, name: str, since: datetime | None) -> AsyncIterator[list[dict]]:
+        path = self._path(name)
+        size = settings.remnawave_sync_page_size
+        offset = 0
+        first_id = None
+        while True:
+            params: Dict[str, Any] = {"offset": offset, "limit": size}
+            if since is not None:
+                params["updated_since"] = since.isoformat()
+            page = await self.client.request("GET", path, endpoint=name, params=params)
+            if not page:
+                return
+            if offset and page[0].get("id") == first_id:
+                logger.warning("remnawave_paging_ignored", extra={"extra": {"endpoint": name, "offset": offset}})
+                return
+            yield page
+            if len(page) != size:
+                if len(page) > size:
+                    logger.warning("remnawave_paging_ignored", extra={"extra": {"endpoint": name, "rows": len(page)}})
+                return
+            first_id = page[0].get("id")
+            offset += len(page)
+
+    async def iter_servers(self, since: datetime | None = None) -> AsyncIterator[list[RemnawaveServer]]:
+        async for page in self._pages("sync_servers", since):
+            yield [map_server(item) for item in page]
+
+    async def iter_users(self, since: datetime | None = None) -> AsyncIterator[list[RemnawaveUser]]:
+        async for page in self._pages("sync_users", since):
+            yield [map_user(item) for item in page]
+
+
+_service: RemnawaveService | None = None
+
+
+def get_remnawave_service() -> RemnawaveService:
+    global _service
+    if _service is None:
+        _service = RemnawaveService()
+    return _service
+
+
+def reload_remnawave_service() -> RemnawaveService:
+    global _service
+    _service = RemnawaveService()
+    return _service
 
-    async def sync_servers(self) -> list[dict]:
-        path = self._path("sync_servers")
-        payload = await self.client.request("GET", path)
-        return [map_server(item).model_dump() for item in payload]
 
-    async def sync_users(self) -> list[dict]:
-        path = self._path("sync_users")
-        payload = await self.client.request("GET", path)
-        return [map_user(item).model_dump() for item in payload]
+def reload_remnawave_config() -> None:
+    fresh = Settings()
+    previous = {name: getattr(settings, name) for name in Settings.model_fields if name.startswith("remnawave_")}
+    for name in previous:
+        setattr(settings, name, getattr(fresh, name))
+    try:
+        service = reload_remnawave_service()
+    except Exception as exc:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+        logger.error("remnawave_reload_failed", extra={"extra": {"error": str(exc)}})
+        return
+    logger.info("remnawave_reloaded", extra={"extra": {"endpoints": service.endpoints}})
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repos.remnawave import get_sync_state, save_sync_state, upsert_remnawave_servers, upsert_remnawave_users
+from app.integrations.remnawave.service import get_remnawave_service
+
+
+@dataclass
+class SyncReport:
+    name: str
+    pages: int
+    upserted: int
+    high_water_mark: datetime | None
+    incremental: bool
+
+
+async def _sync(
+    session: AsyncSession,
+    name: str,
+    pages: Callable[[datetime | None], AsyncIterator[Sequence]],
+    upsert: Callable[[AsyncSession, Sequence], Awaitable[int]],
+    full: bool,
+) -> SyncReport:
+    state = None if full else await get_sync_state(session, name)
+    since = state.high_water_mark if state else None
+    high_water_mark = since
+    page_count = 0
+    upserted = 0
+    async for page in pages(since):
+        upserted += await upsert(session, page)
+        page_count += 1
+        for item in page:
+            if item.updated_at and (high_water_mark is None or item.updated_at > high_water_mark):
+                high_water_mark = item.updated_at
+        await session.commit()
+    await save_sync_state(session, name, high_water_mark, upserted)
+    await session.commit()
+    return SyncReport(name, page_count, upserted, high_water_mark, since is not None)
+
+
+async def sync_users(session: AsyncSession, full: bool = False) -> SyncReport:
+    return await _sync(session, "users", get_remnawave_service().iter_users, upsert_remnawave_users, full)
+
+
+async def sync_servers(session: AsyncSession, full: bool = False) -> SyncReport:
+    return await _sync(session, "servers", get_remnawave_service().iter_servers, upsert_remnawave_servers, full)
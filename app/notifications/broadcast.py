@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from aiogram.exceptions import TelegramAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.config import settings
+from app.common.errors import JobDeferredError
+from app.db.models import JobOutbox
+from app.db.repos.broadcasts import get_broadcast, get_broadcast_status, save_broadcast_progress, stream_recipients
+from app.db.session import SessionLocal
+from app.notifications.sender import BLOCKED, SENT, TelegramSender, get_sender
+
+logger = logging.getLogger("notifications.broadcast")
+
+FAILED = "failed"
+
+
+def broadcast_job(broadcast_id: int) -> JobOutbox:
+    return JobOutbox(
+        job_type="broadcast",
+        payload={"broadcast_id": broadcast_id},
+        status="pending",
+        idempotency_key=f"broadcast:{broadcast_id}",
+    )
+
+
+async def _deliver(sender: TelegramSender, chat_id: int, text: str) -> str | JobDeferredError:
+    try:
+        return await sender.send_message(chat_id, text)
+    except JobDeferredError as exc:
+        return exc
+    except TelegramAPIError as exc:
+        logger.info("broadcast_send_failed", extra={"extra": {"chat_id": chat_id, "error": str(exc)}})
+        return FAILED
+
+
+async def _send_chunk(session: AsyncSession, broadcast_id: int, text: str, chunk: list[int]) -> str:
+    sender = get_sender()
+    results: list[str] = []
+    pending = chunk
+    while pending:
+        outcomes = await asyncio.gather(*(_deliver(sender, chat_id, text) for chat_id in pending))
+        results += [outcome for outcome in outcomes if isinstance(outcome, str)]
+        deferred = [(chat_id, outcome) for chat_id, outcome in zip(pending, outcomes) if not isinstance(outcome, str)]
+        pending = [chat_id for chat_id, _ in deferred]
+        if not pending:
+            break
+        await asyncio.sleep(max(exc.retry_after for _, exc in deferred))
+        if await get_broadcast_status(session, broadcast_id) == "cancelled":
+            break
+    status = await save_broadcast_progress(
+        session,
+        broadcast_id,
+        cursor=chunk[-1],
+        sent=results.count(SENT),
+        failed=results.count(FAILED),
+        blocked=results.count(BLOCKED),
+    )
+    await session.commit()
+    return status
+
+
+async def run_broadcast(session: AsyncSession, broadcast_id: int) -> None:
+    broadcast = await get_broadcast(session, broadcast_id)
+    if not broadcast or broadcast.status in {"done", "cancelled"}:
+        return
+    segment, text, cursor = broadcast.segment, broadcast.text, broadcast.cursor
+    status = await save_broadcast_progress(session, broadcast_id, cursor, status="running")
+    await session.commit()
+    window = settings.broadcast_window_size
+    chunk_size = settings.broadcast_chunk_size
+    while status == "running":
+        seen = 0
+        chunk: list[int] = []
+        async with SessionLocal() as reader:
+            async for chat_id in stream_recipients(reader, segment, cursor, limit=window, yield_per=chunk_size * 4):
+                seen += 1
+                chunk.append(chat_id)
+                if len(chunk) >= chunk_size:
+                    status = await _send_chunk(session, broadcast_id, text, chunk)
+                    cursor = chunk[-1]
+                    chunk = []
+                    if status != "running":
+                        break
+        if chunk and status == "running":
+            status = await _send_chunk(session, broadcast_id, text, chunk)
+            cursor = chunk[-1]
+        if seen < window and status == "running":
+            status = await save_broadcast_progress(session, broadcast_id, cursor, status="done")
+            await session.commit()
+    logger.info("broadcast_finished", extra={"extra": {"broadcast_id": broadcast_id, "status": status}})
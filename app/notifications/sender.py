@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from app.common.config import settings
+from app.common.errors import JobDeferredError
+from app.common.redis import Bucket, drain_bucket, take_tokens
+from app.common.secret_files import cached_secret
+
+logger = logging.getLogger("notifications.sender")
+
+SENT = "sent"
+BLOCKED = "blocked"
+
+
+class TelegramSender:
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self.global_bucket = Bucket("tg:global", settings.telegram_global_per_second, settings.telegram_global_burst)
+
+    def _chat_bucket(self, chat_id: int) -> Bucket:
+        return Bucket(f"tg:chat:{chat_id}", settings.telegram_chat_per_second, settings.telegram_chat_burst)
+
+    async def _acquire(self, chat_id: int) -> None:
+        deadline = time.monotonic() + settings.telegram_max_wait_seconds
+        while True:
+            wait = await take_tokens([self.global_bucket, self._chat_bucket(chat_id)])
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise JobDeferredError("telegram_rate_limited", wait)
+            await asyncio.sleep(wait)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> str:
+        await self._acquire(chat_id)
+        try:
+            await self.bot.send_message(chat_id, text, **kwargs)
+        except TelegramRetryAfter as exc:
+            await drain_bucket(self.global_bucket, exc.retry_after)
+            logger.warning("telegram_retry_after", extra={"extra": {"chat_id": chat_id, "retry_after": exc.retry_after}})
+            raise JobDeferredError("telegram_retry_after", exc.retry_after) from exc
+        except TelegramForbiddenError:
+            logger.info("telegram_chat_blocked", extra={"extra": {"chat_id": chat_id}})
+            return BLOCKED
+        return SENT
+
+
+_sender: TelegramSender | None = None
+
+
+def get_sender() -> TelegramSender:
+    global _sender
+    if _sender is None:
+        _sender = TelegramSender(Bot(token=cached_secret(settings.bot_token_file)))
+    return _sender
+
+
+async def close_sender() -> None:
+    global _sender
+    if _sender is not None:
+        await _sender.bot.session.close()
+        _sender = None
@@ -2,24 +2,25 @@ from __future__ import annotations
 
 from datetime import timedelta
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import JobOutbox
 
-from app.common.time import utcnow
-from app.db.models import Subscription
-from app.db.repos.notifications import has_notification
+# A notice fires once (expires_at - now).days drops to the threshold, i.e. while
+# less than threshold + 1 whole days remain.
+NOTICE_WINDOWS: dict[str, timedelta] = {
+    "expires_3d": timedelta(days=4),
+    "expires_1d": timedelta(days=2),
+}
 
 
-async def schedule_notifications(session: AsyncSession, subscription: Subscription) -> list[str]:
-    notifications: list[str] = []
-    now = utcnow()
-    days_left = (subscription.expires_at - now).days
-    if days_left <= 3:
-        if not await has_notification(session, subscription.user_id, subscription.id, "expires_3d"):
-            notifications.append("expires_3d")
-    if days_left <= 1:
-        if not await has_notification(session, subscription.user_id, subscription.id, "expires_1d"):
-            notifications.append("expires_1d")
-    if subscription.expires_at <= now:
-        if not await has_notification(session, subscription.user_id, subscription.id, "expired"):
-            notifications.append("expired")
-    return notifications
+def notice_job(subscription_id: int, user_id: int, notice_type: str) -> JobOutbox:
+    return JobOutbox(
+        job_type="send_notifications",
+        payload={
+            "kind": "subscription_notice",
+            "user_id": user_id,
+            "subscription_id": subscription_id,
+            "notice_type": notice_type,
+        },
+        status="pending",
+        idempotency_key=f"notice:{subscription_id}:{notice_type}",
+    )
@@ -6,13 +6,16 @@ from datetime import timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.common.time import utcnow
-from app.db.models import Payment, PaymentIntent
-from app.db.repos.payments import create_intent, create_payment, get_payment_by_provider_id, update_intent_status
+from app.common.tracing import current_trace_id
+from app.db.models import JobOutbox, Payment, PaymentIntent
+from app.db.repos.jobs import enqueue_job_safe
+from app.db.repos.payments import create_intent, get_payment_by_provider_id, insert_payment, update_intent_status
 from app.db.repos.promo import create_redemption
-from app.db.repos.referrals import create_referral, get_referral_by_payment
-from app.db.repos.users import get_user
+from app.db.repos.referrals import credit_referral
 from app.payments.providers.base import PaymentProvider
 
+REFERRAL_SHARE = 0.2
+
 
 class PaymentService:
     def __init__(self, provider: PaymentProvider) -> None:
@@ -27,6 +30,7 @@ class PaymentService:
         location_code: str,
         amount_stars: int,
         promo_code_id: int | None = None,
+        meta: dict | None = None,
     ) -> PaymentIntent:
         intent = PaymentIntent(
             user_id=user_id,
@@ -39,45 +43,59 @@ class PaymentService:
             promo_code_id=promo_code_id,
             created_at=utcnow(),
             expires_at=utcnow() + timedelta(hours=1),
-            meta={},
+            meta=meta or {},
         )
         return await create_intent(session, intent)
 
     async def mark_invoiced(self, session: AsyncSession, intent: PaymentIntent) -> PaymentIntent:
         return await update_intent_status(session, intent, "invoiced")
 
-    async def handle_successful_payment(
+    async def settle_payment(
         self,
         session: AsyncSession,
         intent: PaymentIntent,
         provider_payment_id: str,
         raw: dict,
-    ) -> Payment:
-        existing = await get_payment_by_provider_id(session, provider_payment_id)
-        if existing:
-            return existing
-
-        payment = Payment(
-            intent_id=intent.id,
-            user_id=intent.user_id,
-            plan_code=intent.plan_code,
-            provider=self.provider.name,
-            provider_payment_id=provider_payment_id,
-            amount_stars=intent.amount_stars,
-            currency="XTR",
-            status="paid",
-            raw=raw,
+    ) -> tuple[Payment, bool]:
+        payment = await insert_payment(
+            session,
+            Payment(
+                intent_id=intent.id,
+                user_id=intent.user_id,
+                plan_code=intent.plan_code,
+                provider=self.provider.name,
+                provider_payment_id=provider_payment_id,
+                amount_stars=intent.amount_stars,
+                currency="XTR",
+                status="paid",
+                raw=raw,
+            ),
         )
-        payment = await create_payment(session, payment)
+        if payment is None:
+            return await get_payment_by_provider_id(session, provider_payment_id), False
 
         if intent.promo_code_id:
             await create_redemption(session, intent.promo_code_id, intent.user_id)
+        await credit_referral(session, intent.user_id, payment.id, int(payment.amount_stars * REFERRAL_SHARE))
+        await update_intent_status(session, intent, "paid")
+        await enqueue_job_safe(session, provisioning_job(intent, payment))
+        return payment, True
 
-        user = await get_user(session, intent.user_id)
-        if user and user.referrer_id:
-            existing_ref = await get_referral_by_payment(session, payment.id)
-            if not existing_ref:
-                await create_referral(session, user.referrer_id, user.tg_id, payment.id, int(payment.amount_stars * 0.2))
 
-        await update_intent_status(session, intent, "paid")
-        return payment
+def provisioning_job(intent: PaymentIntent, payment: Payment) -> JobOutbox:
+    payload = {
+        "user_id": intent.user_id,
+        "plan_code": intent.plan_code,
+        "location_code": intent.location_code,
+        "period_days": intent.period_days + int(intent.meta.get("free_days", 0)),
+        "payment_id": str(payment.id),
+    }
+    trace_id = current_trace_id()
+    if trace_id:
+        payload["trace_id"] = trace_id
+    return JobOutbox(
+        job_type="provision_subscription",
+        payload=payload,
+        status="pending",
+        idempotency_key=f"payment:{payment.id}",
+    )
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+
+from app.common.metrics import JOB_LATENCY
+from app.common.time import utcnow
+from app.common.tracing import span
+from app.db.models import JobOutbox
+
+logger = logging.getLogger("worker.executor")
+
+JobRunner = Callable[[JobOutbox], Awaitable[None]]
+
+
+class JobExecutor:
+    def __init__(self, runner: JobRunner, concurrency: int, type_limits: Dict[str, int] | None = None) -> None:
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.type_limits = dict(type_limits or {})
+        self._type_slots = {job_type: asyncio.Semaphore(limit) for job_type, limit in self.type_limits.items()}
+        self._tasks: Dict[asyncio.Task, JobOutbox] = {}
+        self._running_by_type: Dict[str, int] = {}
+
+    def free_slots(self) -> int:
+        return max(0, self.concurrency - len(self._tasks))
+
+    def saturated_types(self) -> list[str]:
+        return [
+            job_type
+            for job_type, limit in self.type_limits.items()
+            if self._running_by_type.get(job_type, 0) >= limit
+        ]
+
+    def type_capacity(self) -> Dict[str, int]:
+        return {
+            job_type: max(0, limit - self._running_by_type.get(job_type, 0))
+            for job_type, limit in self.type_limits.items()
+        }
+
+    def running_job_ids(self) -> list[int]:
+        return [job.id for job in self._tasks.values()]
+
+    def submit(self, job: JobOutbox) -> None:
+        self._running_by_type[job.job_type] = self._running_by_type.get(job.job_type, 0) + 1
+        task = asyncio.create_task(self._run(job, time.perf_counter()))
+        self._tasks[task] = job
+        task.add_done_callback(self._on_done)
+
+    async def wait_for_slot(self) -> None:
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), return_when=asyncio.FIRST_COMPLETED)
+
+    async def drain(self) -> None:
+        if self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    async def _run(self, job: JobOutbox, claimed_at: float) -> None:
+        slot = self._type_slots.get(job.job_type)
+        trace_id = (job.payload or {}).get("trace_id")
+        try:
+            with span(
+                "job.run",
+                trace_id=trace_id,
+                job_id=job.id,
+                job_type=job.job_type,
+                attempt=job.attempts,
+                queued_seconds=round((utcnow() - job.created_at).total_seconds(), 3),
+            ):
+                if slot is None:
+                    await self.runner(job)
+                    return
+                async with slot:
+                    await self.runner(job)
+        finally:
+            JOB_LATENCY.labels(job_type=job.job_type).observe(time.perf_counter() - claimed_at)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        job = self._tasks.pop(task)
+        self._running_by_type[job.job_type] -= 1
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "job_runner_crashed",
+                extra={"extra": {"job_id": job.id, "job_type": job.job_type, "error": str(task.exception())}},
+            )
@@ -1,55 +1,73 @@
 from __future__ import annotations
 
 import logging
-
-from aiogram import Bot
+from datetime import timedelta
 
 from app.common.config import settings
 from app.common.time import utcnow
-from app.db.models import JobOutbox
-from app.db.repos.jobs import enqueue_job_safe
-from app.db.repos.notifications import add_notification, has_notification
-from app.db.repos.subscriptions import get_subscription, list_all_subscriptions, update_subscription
-from app.integrations.remnawave.service import RemnawaveService
-from app.notifications.service import schedule_notifications
+from app.db.repos.jobs import (
+    archive_finished_jobs,
+    drop_archive_partitions,
+    enqueue_jobs_bulk,
+    ensure_archive_partitions,
+    get_oldest_finished_job,
+)
+from app.db.repos.notifications import add_notification, has_notification, list_notice_candidates
+from app.db.repos.subscriptions import expire_due_subscriptions, get_subscription
+from app.integrations.remnawave.service import get_remnawave_service
+from app.integrations.remnawave.sync import sync_servers, sync_users
+from app.notifications.broadcast import run_broadcast
+from app.notifications.sender import get_sender
+from app.notifications.service import NOTICE_WINDOWS, notice_job
 from app.provisioning.worker_exec import execute_provisioning
 
 logger = logging.getLogger("worker.handlers")
 
+RECONCILE_CHUNK = 1000
+
 
 async def handle_provision_subscription(session, payload: dict) -> None:
     await execute_provisioning(session, payload)
 
 
 async def handle_sync_servers(session, payload: dict) -> None:
-    service = RemnawaveService()
-    servers = await service.sync_servers()
-    logger.info("sync_servers_done", extra={"extra": {"count": len(servers)}})
+    report = await sync_servers(session, full=bool(payload.get("full")))
+    logger.info("sync_servers_done", extra={"extra": {"count": report.upserted, "pages": report.pages, "incremental": report.incremental}})
 
 
 async def handle_sync_users(session, payload: dict) -> None:
-    service = RemnawaveService()
-    users = await service.sync_users()
-    logger.info("sync_users_done", extra={"extra": {"count": len(users)}})
+    report = await sync_users(session, full=bool(payload.get("full")))
+    logger.info("sync_users_done", extra={"extra": {"count": report.upserted, "pages": report.pages, "incremental": report.incremental}})
 
 
 async def handle_reconcile(session, payload: dict) -> None:
-    subscriptions = await list_all_subscriptions(session)
-    for sub in subscriptions:
-        if sub.status == "active" and sub.expires_at <= utcnow():
-            sub.status = "expired"
-            await update_subscription(session, sub)
-        if settings.notifications_enabled and sub.status == "active":
-            notices = await schedule_notifications(session, sub)
-            for notice in notices:
-                job = JobOutbox(
-                    job_type="send_notifications",
-                    payload={"kind": "subscription_notice", "user_id": sub.user_id, "subscription_id": sub.id, "notice_type": notice},
-                    status="pending",
-                    idempotency_key=f"notice:{sub.id}:{notice}",
-                )
-                await enqueue_job_safe(session, job)
-    logger.info("reconcile_done", extra={"extra": {"count": len(subscriptions)}})
+    expired = 0
+    notices = 0
+    while True:
+        rows = await expire_due_subscriptions(session, limit=RECONCILE_CHUNK)
+        if not rows:
+            break
+        expired += len(rows)
+        if settings.notifications_enabled:
+            report = await enqueue_jobs_bulk(session, [notice_job(sub_id, user_id, "expired") for sub_id, user_id in rows])
+            notices += len(report.created)
+        await session.commit()
+
+    if settings.notifications_enabled:
+        after = None
+        while True:
+            rows = await list_notice_candidates(session, NOTICE_WINDOWS, after=after, limit=RECONCILE_CHUNK)
+            if not rows:
+                break
+            report = await enqueue_jobs_bulk(session, [notice_job(sub_id, user_id, type_) for sub_id, user_id, type_ in rows])
+            notices += len(report.created)
+            await session.commit()
+            after = (rows[-1][0], rows[-1][2])
+    logger.info("reconcile_done", extra={"extra": {"expired": expired, "notices": notices}})
+
+
+async def handle_broadcast(session, payload: dict) -> None:
+    await run_broadcast(session, int(payload["broadcast_id"]))
 
 
 async def handle_send_notifications(session, payload: dict) -> None:
@@ -57,25 +75,25 @@ async def handle_send_notifications(session, payload: dict) -> None:
     user_id = payload.get("user_id")
     if not user_id:
         return
-    bot = Bot(token=settings.read_secret(settings.bot_token_file))
+    sender = get_sender()
     if kind == "delivery_link":
         subscription_id = payload.get("subscription_id")
         subscription = await get_subscription(session, subscription_id, user_id)
         if not subscription:
-            await bot.send_message(user_id, "Подписка не найдена.")
+            await sender.send_message(user_id, "Подписка не найдена.")
             return
         rem_user_id = subscription.provision_meta.get("remnawave_user_id")
         if not rem_user_id:
-            await bot.send_message(user_id, "Ссылка подключения будет доступна после синхронизации.")
+            await sender.send_message(user_id, "Ссылка подключения будет доступна после синхронизации.")
             return
-        service = RemnawaveService()
+        service = get_remnawave_service()
         link_payload = await service.get_delivery_link(rem_user_id)
         link = link_payload.get("url") or link_payload.get("link") or "-"
-        await bot.send_message(user_id, f"Ваша ссылка подключения: {link}")
+        await sender.send_message(user_id, f"Ваша ссылка подключения: {link}")
         return
     if kind == "support_reply":
         text = payload.get("text") or "Ответ поддержки готов."
-        await bot.send_message(user_id, text)
+        await sender.send_message(user_id, text)
         return
     if kind == "subscription_notice":
         subscription_id = payload.get("subscription_id")
@@ -84,10 +102,30 @@ async def handle_send_notifications(session, payload: dict) -> None:
             return
         if await has_notification(session, user_id, subscription_id, notice_type):
             return
-        await add_notification(session, user_id, subscription_id, notice_type)
         message = {
             "expires_3d": "До окончания подписки осталось 3 дня.",
             "expires_1d": "До окончания подписки остался 1 день.",
             "expired": "Подписка завершилась. Продлите доступ в разделе «Купить подписку».",
         }.get(notice_type, "Обновление подписки.")
-        await bot.send_message(user_id, message)
+        await sender.send_message(user_id, message)
+        await add_notification(session, user_id, subscription_id, notice_type)
+
+
+async def handle_archive_jobs(session, payload: dict) -> None:
+    now = utcnow()
+    cutoff = now - timedelta(days=settings.jobs_retention_days)
+    batch_size = max(1, settings.jobs_archive_batch_size)
+    archived = 0
+    oldest = await get_oldest_finished_job(session, cutoff)
+    if oldest is not None:
+        await ensure_archive_partitions(session, oldest, cutoff)
+        await session.commit()
+        while True:
+            moved = await archive_finished_jobs(session, cutoff, batch_size)
+            await session.commit()
+            archived += moved
+            if moved < batch_size:
+                break
+    dropped = await drop_archive_partitions(session, now - timedelta(days=settings.jobs_archive_retention_days))
+    await session.commit()
+    logger.info("archive_jobs_done", extra={"extra": {"archived": archived, "dropped_partitions": dropped}})
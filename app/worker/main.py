@@ -2,18 +2,36 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import signal
 
+from app.catalog.cache import listen_catalog_invalidations
 from app.common.logging import setup_logging
-from app.integrations.remnawave.endpoint_map import build_endpoint_map, validate_endpoints
+from app.common.metrics import start_metrics_server
+from app.common.tracing import close_tracing
+from app.integrations.remnawave.client import close_http_client
+from app.integrations.remnawave.service import get_remnawave_service, reload_remnawave_config
+from app.notifications.sender import close_sender
+from app.worker.periodic import run_periodic
 from app.worker.scheduler import run_forever
 
 
 async def main() -> None:
     setup_logging()
-    logging.getLogger("worker").info("worker_started")
-    endpoints = build_endpoint_map()
-    validate_endpoints(endpoints)
-    await run_forever()
+    logger = logging.getLogger("worker")
+    start_metrics_server()
+    logger.info("worker_started")
+    get_remnawave_service()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_remnawave_config)
+    catalog_listener = asyncio.create_task(listen_catalog_invalidations())
+    periodic = asyncio.create_task(run_periodic())
+    try:
+        await run_forever()
+    finally:
+        catalog_listener.cancel()
+        periodic.cancel()
+        await close_http_client()
+        await close_sender()
+        close_tracing()
 
 
 if __name__ == "__main__":
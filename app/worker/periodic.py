@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.common.config import settings
+from app.common.time import utcnow
+from app.db.models import JobOutbox
+from app.db.repos.jobs import enqueue_jobs_bulk
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("worker.periodic")
+
+PERIODIC_TICK_SECONDS = 60
+
+
+def periodic_jobs() -> dict[str, int]:
+    return {"archive_jobs": settings.jobs_archive_interval_seconds}
+
+
+async def enqueue_due_jobs() -> list[str]:
+    now = int(utcnow().timestamp())
+    jobs = [
+        JobOutbox(
+            job_type=job_type,
+            payload={},
+            status="pending",
+            idempotency_key=f"periodic:{job_type}:{now // interval}",
+        )
+        for job_type, interval in periodic_jobs().items()
+        if interval > 0
+    ]
+    async with SessionLocal() as session:
+        report = await enqueue_jobs_bulk(session, jobs)
+        await session.commit()
+    return list(report.created)
+
+
+async def run_periodic() -> None:
+    while True:
+        try:
+            created = await enqueue_due_jobs()
+            if created:
+                logger.info("periodic_jobs_enqueued", extra={"extra": {"keys": created}})
+        except Exception as exc:
+            logger.error("periodic_enqueue_error", extra={"extra": {"error": str(exc)}})
+        await asyncio.sleep(PERIODIC_TICK_SECONDS)
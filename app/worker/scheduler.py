@@ -2,22 +2,39 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
+import os
+import random
+import socket
 
+from app.common.config import settings
+from app.common.errors import JobDeferredError
+from app.common.metrics import JOB_OUTCOMES
+from app.common.time import utcnow
+from app.common.tracing import span
+from app.db.models import JobOutbox
 from app.db.session import SessionLocal
 from app.db.repos.jobs import (
-    list_pending_jobs,
+    JOBS_CHANNEL,
+    claim_jobs,
+    defer_job,
+    extend_job_leases,
+    get_next_run_after,
     mark_job_done,
     mark_job_failed,
-    mark_job_running,
     reschedule_job,
 )
+from app.worker.executor import JobExecutor
 from app.worker.handlers import (
+    handle_archive_jobs,
+    handle_broadcast,
     handle_provision_subscription,
     handle_reconcile,
     handle_send_notifications,
     handle_sync_servers,
     handle_sync_users,
 )
+from app.worker.wakeup import JobWakeup
 
 logger = logging.getLogger("worker")
 
@@ -27,30 +44,153 @@ JOB_HANDLERS = {
     "sync_users": handle_sync_users,
     "reconcile": handle_reconcile,
     "send_notifications": handle_send_notifications,
+    "broadcast": handle_broadcast,
+    "archive_jobs": handle_archive_jobs,
 }
 
+WORKER_ID = settings.worker_id or f"{socket.gethostname()}:{os.getpid()}"
 
-async def run_once() -> None:
+
+async def _finish(session, job: JobOutbox, transitioned: bool, outcome: str) -> None:
+    if transitioned:
+        await session.commit()
+    else:
+        await session.rollback()
+        outcome = "lease_lost"
+        logger.warning(
+            "job_lease_lost",
+            extra={"extra": {"job_id": job.id, "job_type": job.job_type, "worker_id": WORKER_ID}},
+        )
+    JOB_OUTCOMES.labels(job_type=job.job_type, outcome=outcome).inc()
+
+
+async def process_job(job: JobOutbox) -> None:
+    handler = JOB_HANDLERS.get(job.job_type)
     async with SessionLocal() as session:
-        jobs = await list_pending_jobs(session)
-        for job in jobs:
-            handler = JOB_HANDLERS.get(job.job_type)
-            if not handler:
-                await mark_job_failed(session, job, "unknown_job_type")
-                continue
-            await mark_job_running(session, job)
-            try:
+        if not handler:
+            await _finish(session, job, await mark_job_failed(session, job, WORKER_ID, "unknown_job_type"), "failed")
+            return
+        if job.attempts >= job.max_attempts:
+            failed = await mark_job_failed(session, job, WORKER_ID, job.last_error or "lease_expired")
+            await _finish(session, job, failed, "failed")
+            return
+        try:
+            with span("job.handler", job_type=job.job_type):
                 await handler(session, job.payload)
-                await mark_job_done(session, job)
-            except Exception as exc:
-                if job.attempts + 1 >= job.max_attempts:
-                    await mark_job_failed(session, job, str(exc))
-                else:
-                    delay = min(60 * (2 ** job.attempts), 900)
-                    await reschedule_job(session, job, delay_seconds=delay, error=str(exc))
+        except JobDeferredError as exc:
+            await session.rollback()
+            delay = max(1, math.ceil(exc.retry_after * random.uniform(1.0, 1.5)))
+            deferred = await defer_job(session, job, WORKER_ID, delay_seconds=delay, reason=str(exc))
+            await _finish(session, job, deferred, "deferred")
+            if deferred:
+                logger.info("job_deferred", extra={"extra": {"job_id": job.id, "job_type": job.job_type, "delay": delay}})
+            return
+        except Exception as exc:
+            await session.rollback()
+            if job.attempts + 1 >= job.max_attempts:
+                await _finish(session, job, await mark_job_failed(session, job, WORKER_ID, str(exc)), "failed")
+            else:
+                delay = min(60 * (2 ** job.attempts), 900)
+                rescheduled = await reschedule_job(session, job, WORKER_ID, delay_seconds=delay, error=str(exc))
+                await _finish(session, job, rescheduled, "retried")
+            return
+        await _finish(session, job, await mark_job_done(session, job, WORKER_ID), "done")
 
 
-async def run_forever() -> None:
+def build_executor() -> JobExecutor:
+    return JobExecutor(process_job, settings.worker_concurrency, settings.worker_job_type_limits())
+
+
+async def claim_batch(executor: JobExecutor) -> int:
+    limit = min(executor.free_slots(), settings.worker_batch_size)
+    if limit <= 0:
+        return 0
+    capacity = executor.type_capacity()
+    async with SessionLocal() as session:
+        jobs = await claim_jobs(
+            session,
+            WORKER_ID,
+            limit=limit,
+            lease_seconds=settings.worker_lease_seconds,
+            exclude_types=[job_type for job_type, remaining in capacity.items() if not remaining],
+            type_caps={job_type: remaining for job_type, remaining in capacity.items() if remaining},
+        )
+        await session.commit()
+    for job in jobs:
+        executor.submit(job)
+    return len(jobs)
+
+
+async def heartbeat(executor: JobExecutor) -> None:
+    interval = max(1, settings.worker_lease_seconds // 3)
     while True:
-        await run_once()
-        await asyncio.sleep(5)
+        await asyncio.sleep(interval)
+        try:
+            async with SessionLocal() as session:
+                await extend_job_leases(session, WORKER_ID, executor.running_job_ids(), settings.worker_lease_seconds)
+                await session.commit()
+        except Exception as exc:
+            logger.error("worker_heartbeat_error", extra={"extra": {"error": str(exc)}})
+
+
+async def run_once(executor: JobExecutor | None = None) -> int:
+    executor = executor or build_executor()
+    claimed = await claim_batch(executor)
+    await executor.drain()
+    return claimed
+
+
+async def idle_timeout(backoff: float, exclude_types: list[str] | None = None) -> float:
+    async with SessionLocal() as session:
+        next_run_after = await get_next_run_after(session, exclude_types)
+    if next_run_after is None:
+        return backoff
+    return min(backoff, max((next_run_after - utcnow()).total_seconds(), settings.worker_poll_min_seconds))
+
+
+async def wait_for_work(wakeup: JobWakeup, executor: JobExecutor, timeout: float, saturated: list[str]) -> bool:
+    if not saturated:
+        return await wakeup.wait(timeout)
+    notified = asyncio.create_task(wakeup.wait(timeout))
+    slot = asyncio.create_task(executor.wait_for_slot())
+    done, pending = await asyncio.wait({notified, slot}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    return slot in done or notified.result()
+
+
+async def run_forever() -> None:
+    logger.info("worker_claiming", extra={"extra": {"worker_id": WORKER_ID, "concurrency": settings.worker_concurrency}})
+    executor = build_executor()
+    wakeup = JobWakeup(JOBS_CHANNEL)
+    await wakeup.start()
+    beat = asyncio.create_task(heartbeat(executor))
+    backoff = settings.worker_poll_min_seconds
+    try:
+        while True:
+            try:
+                claimed = await claim_batch(executor)
+            except Exception as exc:
+                logger.error("worker_claim_error", extra={"extra": {"error": str(exc)}})
+                claimed = 0
+            if executor.free_slots() == 0:
+                await executor.wait_for_slot()
+                continue
+            if claimed:
+                backoff = settings.worker_poll_min_seconds
+                continue
+            max_backoff = settings.worker_poll_max_seconds if wakeup.listening else settings.worker_poll_fallback_seconds
+            saturated = executor.saturated_types()
+            try:
+                timeout = await idle_timeout(min(backoff, max_backoff), saturated)
+            except Exception as exc:
+                logger.error("worker_idle_timeout_error", extra={"extra": {"error": str(exc)}})
+                timeout = min(backoff, max_backoff)
+            if await wait_for_work(wakeup, executor, timeout, saturated):
+                backoff = settings.worker_poll_min_seconds
+            else:
+                backoff = min(backoff * 2, max_backoff)
+    finally:
+        beat.cancel()
+        await wakeup.close()
+        await executor.drain()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.common.config import settings
+
+logger = logging.getLogger("worker.wakeup")
+
+
+def listener_dsn() -> str:
+    return make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class JobWakeup:
+    def __init__(self, channel: str, reconnect_seconds: float = 10.0) -> None:
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self._event = asyncio.Event()
+        self._conn: asyncpg.Connection | None = None
+        self._last_attempt = 0.0
+
+    @property
+    def listening(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    async def start(self) -> None:
+        self._last_attempt = time.monotonic()
+        try:
+            conn = await asyncpg.connect(listener_dsn())
+            await conn.add_listener(self.channel, self._on_notify)
+            conn.add_termination_listener(self._on_terminate)
+        except Exception as exc:
+            logger.error("job_wakeup_listen_error", extra={"extra": {"error": str(exc)}})
+            return
+        self._conn = conn
+        logger.info("job_wakeup_listening", extra={"extra": {"channel": self.channel}})
+
+    async def wait(self, timeout: float) -> bool:
+        if not self.listening and time.monotonic() - self._last_attempt >= self.reconnect_seconds:
+            await self.start()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._event.clear()
+
+    async def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            conn.remove_termination_listener(self._on_terminate)
+            await conn.close()
+
+    def _on_notify(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        self._event.set()
+
+    def _on_terminate(self, connection: asyncpg.Connection) -> None:
+        self._conn = None
+        logger.error("job_wakeup_connection_lost")
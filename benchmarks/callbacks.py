@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import itertools
+import time
+
+from aiogram.types import Update
+from sqlalchemy import text
+
+from app.bot.ui import callbacks
+from app.db.session import SessionLocal
+from benchmarks.common import BenchContext, seed_users, summarize
+
+USER_OFFSET = 400_000
+
+_update_ids = itertools.count(1)
+
+
+def callback_update(user_id: int, message_id: int, data: str) -> Update:
+    update_id = next(_update_ids)
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+                "message": {
+                    "message_id": message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": {"id": 123456, "is_bot": True, "first_name": "Bench"},
+                    "text": "bench",
+                },
+            },
+        }
+    )
+
+
+def actions(ctx: BenchContext, subscription_id: int) -> dict[str, str]:
+    return {
+        "home": callbacks.HOME,
+        "buy": callbacks.BUY,
+        "buy_plan": callbacks.pack(callbacks.BUY_PLAN, ctx.plan_code),
+        "buy_location": callbacks.pack(callbacks.BUY_LOCATION, ctx.location_code),
+        "subs": callbacks.SUBSCRIPTIONS,
+        "sub_view": callbacks.pack(callbacks.SUB_VIEW, str(subscription_id)),
+        "devices": callbacks.DEVICES,
+        "adguard": callbacks.ADGUARD,
+        "ref": callbacks.REFERRAL,
+        "support": callbacks.SUPPORT,
+        "support_list": callbacks.SUPPORT_LIST,
+        "faq": callbacks.FAQ,
+    }
+
+
+async def _seed_subscriptions(ctx: BenchContext, user_ids: list[int]) -> dict[int, int]:
+    async with SessionLocal() as session:
+        result = await session.execute(
+            text(
+                """
+                INSERT INTO subscriptions (user_id, plan_code, location_code, expires_at, status, provision_meta)
+                SELECT user_id, :plan_code, :location_code, now() + interval '30 days', 'active', '{}'::jsonb
+                FROM unnest(CAST(:user_ids AS integer[])) AS user_id
+                RETURNING user_id, id
+                """
+            ),
+            {"plan_code": ctx.plan_code, "location_code": ctx.location_code, "user_ids": user_ids},
+        )
+        mapping = {int(user_id): int(sub_id) for user_id, sub_id in result.all()}
+        await session.commit()
+    return mapping
+
+
+async def run(ctx: BenchContext, users: int, iterations: int) -> dict:
+    dp = ctx.dispatcher()
+    user_ids = await seed_users(users, offset=USER_OFFSET)
+    subscriptions = await _seed_subscriptions(ctx, user_ids)
+    samples: dict[str, list[float]] = {}
+    for round_ in range(iterations):
+        user_id = user_ids[round_ % len(user_ids)]
+        for name, data in actions(ctx, subscriptions[user_id]).items():
+            update = callback_update(user_id, round_ + 1, data)
+            started = time.perf_counter()
+            await dp.feed_update(ctx.bot, update)
+            samples.setdefault(name, []).append(time.perf_counter() - started)
+    return {
+        "users": users,
+        "iterations": iterations,
+        "actions": {name: summarize(values) for name, values in samples.items()},
+        "all": summarize([value for values in samples.values() for value in values]),
+    }
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from aiogram import Bot, Dispatcher
+from sqlalchemy import text
+
+from app.common.config import settings
+from app.db.session import SessionLocal
+from benchmarks.stubs import FakeTelegram, RemnawaveStub
+
+logger = logging.getLogger("benchmarks")
+
+USER_BASE = 950_000_000
+MAX_USERS = 1_000_000
+BENCH_USERS = (
+    "SELECT tg_id FROM users WHERE tg_id > :base AND tg_id <= :base + :max_users AND ref_code LIKE 'bench%'"
+)
+PARAMS = {"base": USER_BASE, "max_users": MAX_USERS}
+
+CLEANUP_SQL = [
+    f"""
+    DELETE FROM jobs
+    WHERE idempotency_key LIKE 'bench:%'
+       OR CASE WHEN payload->>'user_id' ~ '^[0-9]{{1,18}}$' THEN (payload->>'user_id')::bigint END IN ({BENCH_USERS})
+    """,
+    f"DELETE FROM notifications_log WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM referral_earnings WHERE referred_id IN ({BENCH_USERS})",
+    f"DELETE FROM promo_redemptions WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM payments WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM payment_intents WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM subscriptions WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM ticket_messages WHERE ticket_id IN (SELECT id FROM tickets WHERE user_id IN ({BENCH_USERS}))",
+    f"DELETE FROM tickets WHERE user_id IN ({BENCH_USERS})",
+    f"DELETE FROM users WHERE tg_id IN ({BENCH_USERS})",
+]
+
+UNMARKED_USERS_SQL = """
+    SELECT count(*) FROM users
+    WHERE tg_id > :base AND tg_id <= :base + :max_users AND ref_code NOT LIKE 'bench%'
+"""
+
+FOREIGN_SQL = {
+    "pending_jobs": """
+        SELECT count(*) FROM jobs
+        WHERE status IN ('pending', 'running') AND (idempotency_key IS NULL OR idempotency_key NOT LIKE 'bench:%')
+    """,
+    "active_subscriptions": f"SELECT count(*) FROM subscriptions WHERE status = 'active' AND user_id NOT IN ({BENCH_USERS})",
+}
+
+
+@dataclass
+class BenchContext:
+    remnawave: RemnawaveStub
+    telegram: FakeTelegram
+    bot: Bot
+    plan_code: str
+    location_code: str
+    _dispatcher: Dispatcher | None = field(default=None, repr=False)
+
+    def dispatcher(self) -> Dispatcher:
+        if self._dispatcher is None:
+            from app.bot.main import build_dispatcher
+
+            self._dispatcher = build_dispatcher()
+        return self._dispatcher
+
+
+def configure_settings() -> None:
+    settings.rate_limit_global_per_second = 1_000_000.0
+    settings.rate_limit_global_burst = 1_000_000.0
+    settings.rate_limit_user_per_second = 1_000_000.0
+    settings.rate_limit_user_burst = 1_000_000.0
+    settings.rate_limit_actions_json = "{}"
+    settings.telegram_global_per_second = 1_000_000.0
+    settings.telegram_global_burst = 1_000_000.0
+    settings.telegram_chat_per_second = 1_000_000.0
+    settings.telegram_chat_burst = 1_000_000.0
+    settings.notifications_enabled = True
+    settings.trace_export_path = ""
+
+
+async def cleanup() -> None:
+    async with SessionLocal() as session:
+        for sql in CLEANUP_SQL:
+            await session.execute(text(sql), PARAMS)
+        await session.commit()
+
+
+async def foreign_rows() -> dict[str, int]:
+    async with SessionLocal() as session:
+        return {
+            name: int((await session.execute(text(sql), PARAMS)).scalar_one())
+            for name, sql in FOREIGN_SQL.items()
+        }
+
+
+async def unmarked_users() -> int:
+    async with SessionLocal() as session:
+        return int((await session.execute(text(UNMARKED_USERS_SQL), PARAMS)).scalar_one())
+
+
+async def catalog_pair() -> tuple[str, str] | None:
+    async with SessionLocal() as session:
+        row = (
+            await session.execute(
+                text(
+                    "SELECT plan_code, location_code FROM plan_location_mapping "
+                    "WHERE is_active ORDER BY id LIMIT 1"
+                )
+            )
+        ).first()
+    return (row[0], row[1]) if row else None
+
+
+async def seed_users(count: int, offset: int = 0) -> list[int]:
+    async with SessionLocal() as session:
+        await session.execute(
+            text(
+                """
+                INSERT INTO users (tg_id, username, created_at, ref_code, adguard_enabled)
+                SELECT :base + g, 'bench' || g, now(), 'bench' || g, false
+                FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) AS g
+                ON CONFLICT DO NOTHING
+                """
+            ),
+            {"base": USER_BASE, "start": offset + 1, "stop": offset + count},
+        )
+        await session.commit()
+    return [USER_BASE + offset + i for i in range(1, count + 1)]
+
+
+async def wait_until(check: Callable[[], Awaitable[bool]], timeout: float, interval: float = 0.005) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await check():
+            return True
+        await asyncio.sleep(interval)
+    return False
+
+
+def summarize(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(value: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(value * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
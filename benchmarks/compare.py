@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+HIGHER_IS_BETTER = ("jobs_per_second",)
+TRACKED = ("_ms", "seconds", "jobs_per_second")
+
+
+def flatten(data, prefix: str = "") -> dict[str, float]:
+    if isinstance(data, dict):
+        items = data.items()
+    elif isinstance(data, list):
+        items = ((str(item.get("subscriptions", index)) if isinstance(item, dict) else str(index), item) for index, item in enumerate(data))
+    else:
+        return {prefix: float(data)} if isinstance(data, (int, float)) and not isinstance(data, bool) else {}
+    flat: dict[str, float] = {}
+    for key, value in items:
+        flat.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    before = flatten(baseline.get("suites", {}))
+    after = flatten(candidate.get("suites", {}))
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        if not key.endswith(TRACKED) or key.endswith("seed_seconds") or not before[key]:
+            continue
+        change = (after[key] - before[key]) / before[key]
+        worse = -change if key.endswith(HIGHER_IS_BETTER) else change
+        rows.append((key, before[key], after[key], change, worse > threshold))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files and flag regressions.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+    rows = compare(json.loads(args.baseline.read_text()), json.loads(args.candidate.read_text()), args.threshold)
+    width = max((len(row[0]) for row in rows), default=0)
+    for key, before, after, change, regressed in rows:
+        print(f"{key:<{width}}  {before:>12.3f}  {after:>12.3f}  {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    if any(row[4] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.db.models import JobOutbox
+from app.db.repos.jobs import enqueue_jobs_bulk
+from app.db.session import SessionLocal
+from app.worker import scheduler
+from benchmarks.common import USER_BASE, BenchContext, wait_until
+
+ENQUEUE_CHUNK = 5000
+
+
+async def _enqueue(prefix: str, count: int) -> None:
+    async with SessionLocal() as session:
+        for start in range(0, count, ENQUEUE_CHUNK):
+            jobs = [
+                JobOutbox(
+                    job_type="send_notifications",
+                    payload={"kind": "support_reply", "user_id": USER_BASE + 1 + i, "text": "benchmark"},
+                    status="pending",
+                    idempotency_key=f"bench:{prefix}:{i}",
+                )
+                for i in range(start, min(start + ENQUEUE_CHUNK, count))
+            ]
+            await enqueue_jobs_bulk(session, jobs)
+            await session.commit()
+
+
+async def _remaining(prefix: str) -> int:
+    async with SessionLocal() as session:
+        result = await session.execute(
+            text("SELECT count(*) FROM jobs WHERE idempotency_key LIKE :prefix AND status IN ('pending', 'running')"),
+            {"prefix": f"bench:{prefix}:%"},
+        )
+        return int(result.scalar_one())
+
+
+async def bench_run_once(count: int) -> dict:
+    prefix = f"once:{time.time_ns()}"
+    await _enqueue(prefix, count)
+    started = time.perf_counter()
+    batches = 0
+    while await scheduler.run_once():
+        batches += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "jobs": count,
+        "batches": batches,
+        "seconds": round(elapsed, 3),
+        "jobs_per_second": round(count / elapsed, 1),
+        "left_over": await _remaining(prefix),
+    }
+
+
+async def bench_run_forever(count: int, timeout: float) -> dict:
+    prefix = f"forever:{time.time_ns()}"
+    worker = asyncio.create_task(scheduler.run_forever())
+    try:
+        await asyncio.sleep(0.5)
+        started = time.perf_counter()
+        await _enqueue(prefix, count)
+
+        async def drained() -> bool:
+            return await _remaining(prefix) == 0
+
+        finished = await wait_until(drained, timeout, interval=0.05)
+        elapsed = time.perf_counter() - started
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+    return {
+        "jobs": count,
+        "seconds": round(elapsed, 3),
+        "jobs_per_second": round(count / elapsed, 1),
+        "completed": finished,
+    }
+
+
+async def run(ctx: BenchContext, count: int, timeout: float) -> dict:
+    sent_before = ctx.telegram.calls["sendMessage"]
+    result = {
+        "run_once": await bench_run_once(count),
+        "run_forever": await bench_run_forever(count, timeout),
+    }
+    result["telegram_messages"] = ctx.telegram.calls["sendMessage"] - sent_before
+    return result
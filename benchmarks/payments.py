@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from aiogram.types import Update
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.payments.providers.stars import StarsProvider
+from app.payments.service import PaymentService
+from app.worker import scheduler
+from benchmarks.common import BenchContext, seed_users, summarize, wait_until
+
+USER_OFFSET = 200_000
+
+
+def payment_update(update_id: int, user_id: int, intent_id: str, amount: int) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+                "successful_payment": {
+                    "currency": "XTR",
+                    "total_amount": amount,
+                    "invoice_payload": intent_id,
+                    "telegram_payment_charge_id": f"bench:{intent_id}",
+                    "provider_payment_charge_id": f"bench:{intent_id}",
+                },
+            },
+        }
+    )
+
+
+async def _create_intents(ctx: BenchContext, user_ids: list[int]) -> list[str]:
+    service = PaymentService(StarsProvider())
+    intent_ids = []
+    async with SessionLocal() as session:
+        for user_id in user_ids:
+            intent = await service.create_intent(session, user_id, ctx.plan_code, 30, ctx.location_code, 100)
+            intent_ids.append(str(intent.id))
+        await session.commit()
+    return intent_ids
+
+
+async def _provisioned(user_id: int) -> bool:
+    async with SessionLocal() as session:
+        result = await session.execute(
+            text("SELECT 1 FROM subscriptions WHERE user_id = :user_id AND status = 'active'"),
+            {"user_id": user_id},
+        )
+        return result.first() is not None
+
+
+async def run(ctx: BenchContext, count: int, timeout: float) -> dict:
+    dp = ctx.dispatcher()
+    user_ids = await seed_users(count, offset=USER_OFFSET)
+    intent_ids = await _create_intents(ctx, user_ids)
+    remnawave_before = sum(ctx.remnawave.calls.values())
+    handler_samples: list[float] = []
+    provisioned_samples: list[float] = []
+    timeouts = 0
+    worker = asyncio.create_task(scheduler.run_forever())
+    try:
+        await asyncio.sleep(0.5)
+        for index, (user_id, intent_id) in enumerate(zip(user_ids, intent_ids)):
+            update = payment_update(USER_OFFSET + index, user_id, intent_id, 100)
+            started = time.perf_counter()
+            await dp.feed_update(ctx.bot, update)
+            handler_samples.append(time.perf_counter() - started)
+            if await wait_until(lambda: _provisioned(user_id), timeout, interval=0.002):
+                provisioned_samples.append(time.perf_counter() - started)
+            else:
+                timeouts += 1
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+    return {
+        "payments": count,
+        "handler": summarize(handler_samples),
+        "payment_to_provisioned": summarize(provisioned_samples),
+        "timeouts": timeouts,
+        "remnawave_calls": sum(ctx.remnawave.calls.values()) - remnawave_before,
+    }
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import time
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.worker.handlers import handle_reconcile
+from benchmarks.common import BENCH_USERS, PARAMS, USER_BASE, BenchContext, cleanup, logger
+
+SEED_SQL = [
+    """
+    INSERT INTO users (tg_id, username, created_at, ref_code, adguard_enabled)
+    SELECT :base + g, NULL, now(), 'benchr' || g, false FROM generate_series(1, CAST(:rows AS integer)) AS g
+    """,
+    """
+    INSERT INTO subscriptions (user_id, plan_code, location_code, expires_at, status, provision_meta)
+    SELECT :base + g, :plan_code, :location_code,
+           now() + CASE
+               WHEN g % 20 = 0 THEN -interval '1 hour'
+               WHEN g % 20 < 5 THEN (g % 20) * interval '18 hours'
+               ELSE interval '30 days'
+           END,
+           'active', '{}'::jsonb
+    FROM generate_series(1, CAST(:rows AS integer)) AS g
+    """,
+]
+
+COUNT_SQL = {
+    "expired": f"SELECT count(*) FROM subscriptions WHERE user_id IN ({BENCH_USERS}) AND status = 'expired'",
+    "notices": f"""
+        SELECT count(*) FROM jobs
+        WHERE payload->>'kind' = 'subscription_notice' AND (payload->>'user_id')::bigint IN ({BENCH_USERS})
+    """,
+}
+
+
+async def _seed(ctx: BenchContext, rows: int) -> float:
+    params = {"base": USER_BASE, "rows": rows, "plan_code": ctx.plan_code, "location_code": ctx.location_code}
+    started = time.perf_counter()
+    async with SessionLocal() as session:
+        for sql in SEED_SQL:
+            await session.execute(text(sql), params)
+        await session.commit()
+        for table in ("users", "subscriptions", "notifications_log", "jobs"):
+            await session.execute(text(f"ANALYZE {table}"))
+        await session.commit()
+    return time.perf_counter() - started
+
+
+async def bench_size(ctx: BenchContext, rows: int) -> dict:
+    await cleanup()
+    seed_seconds = await _seed(ctx, rows)
+    started = time.perf_counter()
+    async with SessionLocal() as session:
+        await handle_reconcile(session, {})
+        await session.commit()
+    elapsed = time.perf_counter() - started
+    async with SessionLocal() as session:
+        counts = {
+            name: int((await session.execute(text(sql), PARAMS)).scalar_one())
+            for name, sql in COUNT_SQL.items()
+        }
+    result = {"subscriptions": rows, "seed_seconds": round(seed_seconds, 3), "seconds": round(elapsed, 3), **counts}
+    logger.info("benchmark_reconcile", extra={"extra": result})
+    return result
+
+
+async def run(ctx: BenchContext, sizes: list[int]) -> dict:
+    try:
+        return {"sizes": [await bench_size(ctx, rows) for rows in sizes]}
+    finally:
+        await cleanup()
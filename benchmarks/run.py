@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.common.config import settings
+from app.common.logging import setup_logging
+from app.db.session import engine
+from app.integrations.remnawave.client import close_http_client
+from app.integrations.remnawave.service import reload_remnawave_service
+from app.notifications import sender
+from benchmarks import callbacks, jobs, payments, reconcile
+from benchmarks.common import (
+    MAX_USERS,
+    USER_BASE,
+    BenchContext,
+    catalog_pair,
+    cleanup,
+    configure_settings,
+    foreign_rows,
+    logger,
+    unmarked_users,
+)
+from benchmarks.stubs import FakeTelegram, RemnawaveStub
+
+SUITES = ("jobs", "payments", "reconcile", "callbacks")
+MUTATING_SUITES = {"jobs", "payments", "reconcile"}
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _ints(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark worker throughput, payment provisioning, reconcile and bot callbacks "
+        "against the configured Postgres/Redis with stub Remnawave and Telegram servers."
+    )
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--reconcile-sizes", type=_ints, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--callback-users", type=int, default=50)
+    parser.add_argument("--callback-iterations", type=int, default=200)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument(
+        "--allow-foreign-data",
+        action="store_true",
+        help="run worker and reconcile suites even though non-benchmark jobs or subscriptions exist; they will be processed",
+    )
+    return parser.parse_args()
+
+
+async def run_suite(ctx: BenchContext, name: str, args: argparse.Namespace) -> dict:
+    if name == "jobs":
+        return await jobs.run(ctx, args.jobs, args.timeout)
+    if name == "payments":
+        return await payments.run(ctx, args.payments, args.timeout)
+    if name == "reconcile":
+        return await reconcile.run(ctx, args.reconcile_sizes)
+    if name == "callbacks":
+        return await callbacks.run(ctx, args.callback_users, args.callback_iterations)
+    raise ValueError(f"unknown suite {name}")
+
+
+def check_sizes(args: argparse.Namespace) -> None:
+    needed = {
+        "payments": payments.USER_OFFSET + args.payments,
+        "reconcile": max(args.reconcile_sizes, default=0),
+        "callbacks": callbacks.USER_OFFSET + args.callback_users,
+    }
+    too_large = {name: rows for name, rows in needed.items() if rows > MAX_USERS}
+    if too_large:
+        raise SystemExit(f"benchmark users must fit in tg_id ({USER_BASE}, {USER_BASE + MAX_USERS}]: {too_large}")
+
+
+async def main() -> None:
+    args = parse_args()
+    suites = [name.strip() for name in args.suites.split(",") if name.strip()]
+    unknown = sorted(set(suites) - set(SUITES))
+    if unknown:
+        raise SystemExit(f"unknown suites: {', '.join(unknown)}")
+    check_sizes(args)
+    setup_logging()
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+    configure_settings()
+    pair = await catalog_pair()
+    if pair is None:
+        raise SystemExit("no active plan/location mapping, run `make seed` first")
+    unmarked = await unmarked_users()
+    if unmarked:
+        raise SystemExit(
+            f"{unmarked} users without the benchmark ref_code marker exist in tg_id "
+            f"({USER_BASE}, {USER_BASE + MAX_USERS}]; refusing to seed or clean up there"
+        )
+    foreign = await foreign_rows()
+    if any(foreign.values()) and MUTATING_SUITES & set(suites) and not args.allow_foreign_data:
+        raise SystemExit(
+            f"database holds non-benchmark data {foreign}; the worker and reconcile suites would process it. "
+            "Run against a scratch database or pass --allow-foreign-data"
+        )
+
+    latency = args.stub_latency_ms / 1000
+    remnawave = RemnawaveStub(latency)
+    telegram = FakeTelegram(latency)
+    settings.remnawave_base_url = await remnawave.start()
+    await telegram.start()
+    reload_remnawave_service()
+    bot = telegram.bot()
+    sender._sender = sender.TelegramSender(bot)
+    ctx = BenchContext(remnawave=remnawave, telegram=telegram, bot=bot, plan_code=pair[0], location_code=pair[1])
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "service": settings.service_name,
+            "db_profile": settings.db_engine_profile(settings.service_name),
+            "stub_latency_ms": args.stub_latency_ms,
+            "plan_code": ctx.plan_code,
+            "location_code": ctx.location_code,
+            "foreign_rows": foreign,
+        },
+        "suites": {},
+    }
+    try:
+        for name in suites:
+            await cleanup()
+            started = time.perf_counter()
+            result = await run_suite(ctx, name, args)
+            result["wall_seconds"] = round(time.perf_counter() - started, 3)
+            report["suites"][name] = result
+            logger.info("benchmark_suite_done", extra={"extra": {"suite": name, "seconds": result["wall_seconds"]}})
+    finally:
+        await cleanup()
+        await bot.session.close()
+        sender._sender = None
+        await remnawave.stop()
+        await telegram.stop()
+        await close_http_client()
+        await engine.dispose()
+
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    logger.info("benchmark_results_written", extra={"extra": {"path": str(output)}})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+BOT_TOKEN = "123456:benchmark"
+
+
+class Stub(ABC):
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    @abstractmethod
+    def routes(self, app: web.Application) -> None:
+        ...
+
+    async def start(self, port: int = 0) -> str:
+        app = web.Application()
+        self.routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+        host, bound = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{bound}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _delay(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class RemnawaveStub(Stub):
+    def routes(self, app: web.Application) -> None:
+        app.router.add_post("/api/users", self.create_user)
+        app.router.add_patch("/api/users/{user_id}", self.update_user)
+        app.router.add_post("/api/users/{user_id}/extend", self.extend)
+        app.router.add_get("/api/users/{user_id}/delivery", self.delivery)
+        app.router.add_get("/api/users", self.empty_page)
+        app.router.add_get("/api/servers", self.empty_page)
+
+    async def create_user(self, request: web.Request) -> web.Response:
+        self.calls["create_user"] += 1
+        await self._delay()
+        body = await request.json()
+        return web.json_response({"id": f"rw-{body['username']}", "username": body["username"]})
+
+    async def update_user(self, request: web.Request) -> web.Response:
+        self.calls["update_user"] += 1
+        await self._delay()
+        return web.json_response({"id": request.match_info["user_id"]})
+
+    async def extend(self, request: web.Request) -> web.Response:
+        self.calls["extend_expiration"] += 1
+        await self._delay()
+        return web.json_response({"id": request.match_info["user_id"]})
+
+    async def delivery(self, request: web.Request) -> web.Response:
+        self.calls["get_delivery_link"] += 1
+        await self._delay()
+        return web.json_response({"url": f"vless://{request.match_info['user_id']}@bench"})
+
+    async def empty_page(self, request: web.Request) -> web.Response:
+        self.calls["sync"] += 1
+        return web.json_response([])
+
+
+class FakeTelegram(Stub):
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__(latency)
+        self._message_ids = itertools.count(1000)
+
+    def routes(self, app: web.Application) -> None:
+        app.router.add_post("/bot{token}/{method}", self.call)
+
+    def bot(self) -> Bot:
+        return Bot(BOT_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(self.url)))
+
+    def _message(self, data) -> dict:
+        return {
+            "message_id": int(data.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": int(data.get("chat_id") or 0), "type": "private"},
+            "text": data.get("text") or "",
+        }
+
+    async def call(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        await self._delay()
+        data = await request.post()
+        if method == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method in {"sendMessage", "editMessageText", "sendInvoice"}:
+            result = self._message(data)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})